@@ -1,2 +1,5 @@
 from .feishu_doc_api import FeishuDocClient
+from .async_feishu_doc_api import AsyncFeishuDocClient
+from .batch_result import BatchResult, UploadResult
 from .feishu_token import FeishuToken
+from .table_index import TableIndex
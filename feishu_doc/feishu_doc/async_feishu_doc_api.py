@@ -0,0 +1,168 @@
+import asyncio
+import os
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .feishu_token import FeishuToken
+
+BASE_URL = 'https://base-api.feishu.cn'
+
+
+class AsyncFeishuDocClient:
+    """
+    asyncio 版本的 FeishuDocClient，所有请求共用一个连接池，并发数由 max_concurrency 限制。
+
+    用法：
+        async with AsyncFeishuDocClient(token, max_concurrency=20) as client:
+            await asyncio.gather(*(client.insert(table_id, batch) for batch in batches))
+    """
+
+    def __init__(self, token: FeishuToken, max_concurrency: int = 10, base_url: str = BASE_URL,
+                 timeout: float = 60):
+        if aiohttp is None:
+            raise ImportError('AsyncFeishuDocClient 需要安装 aiohttp: pip install feishu_doc[async]')
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Authorization': f'Bearer {self.token.personal_token}'}
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _records_path(self, table_id, suffix=''):
+        return f'/open-apis/bitable/v1/apps/{self.token.app_token}/tables/{table_id}/records{suffix}'
+
+    async def _request(self, method, path, params=None, json=None, data=None) -> dict:
+        async with self._semaphore:
+            async with self.session.request(method, self.base_url + path, params=params, json=json,
+                                            data=data) as response:
+                try:
+                    return await response.json(content_type=None)
+                except ValueError:
+                    return {'code': response.status, 'msg': await response.text()}
+
+    async def upload(self, table_id, record_id, field_name, file_path, remove=False):
+        file_path = os.path.abspath(file_path)
+        file_name = os.path.basename(file_path)
+
+        # 上传图片到 Drive 获取 file_token
+        with open(file_path, 'rb') as f:
+            form = aiohttp.FormData()
+            form.add_field('file_name', file_name)
+            form.add_field('parent_type', 'bitable_file')
+            form.add_field('parent_node', self.token.app_token)
+            form.add_field('size', str(os.path.getsize(file_path)))
+            form.add_field('file', f, filename=file_name)
+            response = await self._request('POST', '/open-apis/drive/v1/medias/upload_all', data=form)
+        print(f"上传文件 success! code = {response.get('code')} msg = {response.get('msg')}")
+
+        file_token = (response.get('data') or {}).get('file_token')
+
+        if file_token:
+            # 更新 file_token 到附件字段
+            response = await self._request('PUT', self._records_path(table_id, f'/{record_id}'),
+                                           json={'fields': {field_name: [{'file_token': file_token}]}})
+            print(f"更新附件字段 success! code = {response.get('code')} msg = {response.get('msg')}")
+
+            if remove and response.get('code') == 0:
+                print('上传成功，删除文件')
+                os.remove(file_path)
+
+    async def download(self, file_token, file_path, chunk_size=1024 * 1024):
+        # 分块写入本地文件
+        async with self._semaphore:
+            async with self.session.get(f'{self.base_url}/open-apis/drive/v1/medias/{file_token}/download') as response:
+                response.raise_for_status()
+                with open(file_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        f.write(chunk)
+
+    async def _list(self, table_id, page_size=100, page_token='', predicate='', sort=''):
+        params = {'page_size': page_size}
+        if page_token:
+            params['page_token'] = page_token
+        if predicate:
+            params['filter'] = predicate
+        if sort:
+            params['sort'] = sort
+        return await self._request('GET', self._records_path(table_id), params=params)
+
+    # 读取指定条数的纪录
+    async def read(self, table_id, page_size=100, read_all=True):
+        page_token = ''
+
+        while True:
+            response = await self._list(table_id, page_size, page_token)
+            print(f"read success! code = {response.get('code')} msg = {response.get('msg')}")
+
+            data = (response.get('data') or {}) if response.get('code') == 0 else {}
+            for item in data.get('items') or []:
+                yield item
+            page_token = data.get('page_token', '')
+
+            if not data.get('has_more') or not read_all or not page_token:
+                return
+
+    # 根据条件查找纪录
+    async def find(self, table_id, predicate):
+        response = await self._list(table_id, predicate=predicate)
+        print(f"find end! code: {response.get('code')} msg = {response.get('msg')}")
+        return (response.get('data') or {}).get('items') or []
+
+    async def find_with_params(self, table_id, predicate="", page_size=100, sort=""):
+        response = await self._list(table_id, page_size, predicate=predicate, sort=sort)
+        print(f"find end! code = {response.get('code')} msg = {response.get('msg')}")
+        return (response.get('data') or {}).get('items') or []
+
+    async def update(self, table_id, records_need_update):
+        """
+        批量更新记录
+        :param table_id:
+        :param records_need_update: [{"record_id": record_id,"fields": item}]
+        :return:
+        """
+        response = await self._request('POST', self._records_path(table_id, '/batch_update'),
+                                       json={'records': records_need_update})
+        print(f"update end ! code:{response.get('code')} {response.get('msg')} size: {len(records_need_update)}")
+        return response.get('code') == 0
+
+    async def insert(self, table_id, records_need_insert):
+        """
+        批量插入记录
+        :param table_id:
+        :param records_need_insert: [{"fields": item}]
+        :return:
+        """
+        response = await self._request('POST', self._records_path(table_id, '/batch_create'),
+                                       json={'records': records_need_insert})
+        print(f"insert end ! code:{response.get('code')} {response.get('msg')} size:{len(records_need_insert)}")
+        return response.get('code') == 0
+
+    async def delete(self, table_id, records):
+        response = await self._request('POST', self._records_path(table_id, '/batch_delete'),
+                                       json={'records': records})
+        print(f"delete end! {response.get('code')} {response.get('msg')}")
+        return response.get('code') == 0
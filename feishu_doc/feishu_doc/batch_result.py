@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+# upload_many 中单个文件的结果
+UploadResult = namedtuple('UploadResult', ['table_id', 'record_id', 'field_name', 'file_path', 'file_token', 'success'])
+
+
+class ChunkResult:
+    """单个分片请求的结果"""
+
+    def __init__(self, index, records, response):
+        self.index = index
+        self.records = records
+        self.response = response
+        self.success = response.success()
+        self.code = response.code
+        self.msg = response.msg
+        self.error = None
+
+    @classmethod
+    def from_error(cls, index, records, error):
+        """重试用尽后仍然抛出异常的分片，没有 response"""
+        result = cls.__new__(cls)
+        result.index = index
+        result.records = records
+        result.response = None
+        result.success = False
+        result.code = None
+        result.msg = str(error)
+        result.error = error
+        return result
+
+    @property
+    def created(self):
+        """接口返回的记录，插入时包含新记录的 record_id"""
+        return getattr(getattr(self.response, 'data', None), 'records', None) or []
+
+    def __repr__(self):
+        return f'ChunkResult(index={self.index}, size={len(self.records)}, code={self.code}, msg={self.msg})'
+
+
+def _record_id(record):
+    if isinstance(record, str):
+        return record
+    if isinstance(record, dict):
+        return record.get('record_id')
+    return getattr(record, 'record_id', None)
+
+
+class BatchResult:
+    """
+    分片批量操作的汇总结果，全部分片成功时为真值，可以像原来的 bool 返回值一样使用
+    """
+
+    def __init__(self, chunks):
+        self.chunks = sorted(chunks, key=lambda chunk: chunk.index)
+
+    @property
+    def success(self):
+        return all(chunk.success for chunk in self.chunks)
+
+    @property
+    def failed_chunks(self):
+        return [chunk for chunk in self.chunks if not chunk.success]
+
+    @property
+    def failed_records(self):
+        return [record for chunk in self.failed_chunks for record in chunk.records]
+
+    @property
+    def failed_record_ids(self):
+        """失败记录的 record_id，插入的记录没有 record_id"""
+        return [record_id for record_id in map(_record_id, self.failed_records) if record_id]
+
+    @property
+    def created(self):
+        return [record for chunk in self.chunks for record in chunk.created]
+
+    def __bool__(self):
+        return self.success
+
+    def __eq__(self, other):
+        if isinstance(other, bool):
+            return self.success is other
+        return NotImplemented
+
+    def __hash__(self):
+        return id(self)
+
+    def __repr__(self):
+        return f'BatchResult(success={self.success}, chunks={self.chunks})'
@@ -1,38 +1,199 @@
+import hashlib
+import io
+import json
 import os
-
+import queue
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 from baseopensdk import BaseClient
 from baseopensdk.api.base.v1 import *
 from baseopensdk.api.drive.v1 import *
 
+from .async_feishu_doc_api import BASE_URL
+from .batch_result import BatchResult, ChunkResult, UploadResult
 from .feishu_token import FeishuToken
+from .rate_limit import TokenBucket, backoff_delay, should_retry
+from .table_index import TableIndex, field_key
+
+# 多维表格批量接口单次最多 500 条记录
+BATCH_SIZE = 500
+# 超过 20MB 的文件需要分片上传
+UPLOAD_ALL_LIMIT = 20 * 1024 * 1024
+# 按 key 查找时每个 OR 过滤条件包含的 key 数，避免过滤条件过长
+FILTER_KEY_SIZE = 50
+
+
+def _filter_value(value):
+    """过滤条件中的字符串值，转义反斜杠和双引号"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _compare_value(value):
+    """字段值用于比较的规范形式：文本字段取拼接后的文本，人员、附件、关联等其他列表和字典按 JSON 比较"""
+    if isinstance(value, list) and value and all(isinstance(item, dict) and 'text' in item for item in value):
+        return field_key(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return value
+
+
+def _fields_hash(fields, names):
+    """按字段名计算字段值的哈希，用于判断记录是否需要更新"""
+    values = {name: _compare_value(fields.get(name)) for name in names}
+    return hashlib.sha1(json.dumps(values, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+
+# 预取线程结束标记
+_DONE = object()
+
+
+def _prefetch(iterable, depth):
+    """
+    在后台线程中提前迭代 iterable，最多缓存 depth 个元素；调用方提前关闭生成器时通知后台线程退出
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(entry):
+        # 队列满时等待，调用方关闭后放弃
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except Exception as e:
+            put((_DONE, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
 
 
 class FeishuDocClient:
-    def __init__(self, token: FeishuToken):
+    def __init__(self, token: FeishuToken, max_workers=4, batch_size=BATCH_SIZE, qps=10, max_retries=5):
         self.client = BaseClient.builder() \
             .app_token(token.app_token) \
             .personal_base_token(token.personal_token) \
             .build()
         self.token = token
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        # 所有请求共用一个令牌桶，和飞书接口的频率限制对齐
+        self.rate_limiter = TokenBucket(qps)
+        # table_id -> TableIndex，enable_index 开启
+        self.indexes = {}
+
+    def enable_index(self, table_id, key_field, ttl=None, sqlite_path=None) -> TableIndex:
+        """
+        为表格开启本地 key -> record_id 索引，第一次使用时读取全表，之后由 insert/update/delete 维护
+        :param table_id:
+        :param key_field: 建索引的字段名
+        :param ttl: 有效期（秒），过期后重新读取全表
+        :param sqlite_path: 持久化到 SQLite 文件，多次运行共用
+        :return: TableIndex
+        """
+        index = TableIndex(table_id, key_field, ttl=ttl, sqlite_path=sqlite_path)
+        self.indexes[table_id] = index
+        return index
+
+    def _index(self, table_id, key_field=None):
+        """表格的可用索引，没有开启或 key 字段不一致时返回 None，过期时重新读取全表"""
+        index = self.indexes.get(table_id)
+        if index is None or (key_field is not None and index.key_field != key_field):
+            return None
+        if not index.fresh:
+            # 先完整读取再重建，读取失败时索引保持过期，不会把部分记录当作全表
+            records = list(self.read(table_id, page_size=BATCH_SIZE, prefetch=2, field_names=[index.key_field],
+                                     strict=True, automatic_fields=True))
+            index.rebuild(records)
+        return index
+
+    def _succeeded_records(self, table_id, result):
+        """已建立索引时返回成功分片的记录，用于维护索引"""
+        index = self.indexes.get(table_id)
+        if index is None or index.built_at is None:
+            return None, []
+        return index, [record for chunk in result.chunks if chunk.success for record in chunk.records]
+
+    def _execute(self, call, request):
+        """
+        统一发起请求：客户端限流，遇到频率限制、临时错误和 5xx 时指数退避重试
+        :param call: SDK 接口方法
+        :param request: 请求对象，或每次调用返回新请求对象的函数（请求体不能重复使用时）
+        :return: 最后一次请求的 response
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = call(request() if callable(request) else request)
+            except Exception as e:
+                # 网络异常
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"请求异常，{delay:.1f}s 后重试: {e}")
+                time.sleep(delay)
+                continue
+
+            if attempt == self.max_retries or not should_retry(response):
+                return response
+            delay = backoff_delay(attempt)
+            print(f"请求失败，{delay:.1f}s 后重试 code = {response.code} msg = {response.msg}")
+            time.sleep(delay)
+
+    def _dispatch(self, records, send) -> BatchResult:
+        """
+        按 batch_size 分片，多个分片时用线程池并发发送
+        :param records: 全部记录
+        :param send: send(index, chunk) -> ChunkResult
+        :return: BatchResult
+        """
+        records = list(records)
+        chunks = [records[i:i + self.batch_size] for i in range(0, len(records), self.batch_size)]
+
+        def safe_send(index, chunk):
+            # 单个分片异常时记为失败分片，不影响其他分片的结果
+            try:
+                return send(index, chunk)
+            except Exception as e:
+                print(f"分片 {index} 请求异常: {e}")
+                return ChunkResult.from_error(index, chunk, e)
+
+        if len(chunks) <= 1 or self.max_workers <= 1:
+            return BatchResult([safe_send(i, chunk) for i, chunk in enumerate(chunks)])
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+            return BatchResult(list(pool.map(safe_send, range(len(chunks)), chunks)))
 
     def upload(self, table_id, record_id, field_name, file_path, remove=False):
         file_path = os.path.abspath(file_path)
-        file_name = os.path.basename(file_path)
 
         # 上传图片到 Drive 获取 file_token
-        request = UploadAllMediaRequest.builder() \
-            .request_body(UploadAllMediaRequestBody.builder()
-                          .file_name(file_name)
-                          .parent_type("bitable_file")
-                          .parent_node(self.token.app_token)
-                          .size(os.path.getsize(file_path))
-                          .file(open(file_path, 'rb'))
-                          .build()) \
-            .build()
-        response: UploadAllMediaResponse = self.client.drive.v1.media.upload_all(request)
-        print(f"上传文件 success! code = {response.code} msg = {response.msg}")
-
-        file_token = response.data.file_token
+        file_token = self.upload_media(file_path)
 
         if file_token:
             # 更新 file_token 到附件字段
@@ -43,17 +204,180 @@ class FeishuDocClient:
                               .fields({field_name: [{"file_token": file_token}]})
                               .build()) \
                 .build()
-            response: UpdateAppTableRecordResponse = self.client.base.v1.app_table_record.update(request)
+            response: UpdateAppTableRecordResponse = self._execute(self.client.base.v1.app_table_record.update, request)
             print(f"更新附件字段 success! code = {response.code} msg = {response.msg}")
 
             if remove and response.code == 0:
                 print('上传成功，删除文件')
                 os.remove(file_path)
 
-    def download(self, file_token, file_path):
-        # 保存文件到本地
-        with open(file_path, "wb") as f:
-            f.write(self.download_stream(file_token).read())
+    def upload_many(self, items, remove=False):
+        """
+        批量上传附件：并发上传文件，再按表格合并成批量更新
+        :param items: [(table_id, record_id, field_name, file_path)]，同一条记录同一字段的多个文件合并成一个附件列表
+        :param remove: 更新成功后删除本地文件，同一文件的所有条目都成功时才删除
+        :return: [UploadResult]，和 items 顺序一致
+        """
+        items = [(table_id, record_id, field_name, os.path.abspath(file_path))
+                 for table_id, record_id, field_name, file_path in items]
+
+        def upload(item):
+            try:
+                return self.upload_media(item[3])
+            except Exception as e:
+                print(f"上传文件失败 {item[3]}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(items)))) as pool:
+            file_tokens = list(pool.map(upload, items))
+
+        # 按表格、记录合并附件字段
+        tables = {}
+        for (table_id, record_id, field_name, _), file_token in zip(items, file_tokens):
+            if file_token:
+                fields = tables.setdefault(table_id, {}).setdefault(record_id, {})
+                fields.setdefault(field_name, []).append({"file_token": file_token})
+
+        failed = set()
+        for table_id, records in tables.items():
+            result = self.update(table_id, [{"record_id": record_id, "fields": fields}
+                                            for record_id, fields in records.items()])
+            failed.update((table_id, record_id) for record_id in result.failed_record_ids)
+
+        results = []
+        for (table_id, record_id, field_name, file_path), file_token in zip(items, file_tokens):
+            success = bool(file_token) and (table_id, record_id) not in failed
+            results.append(UploadResult(table_id, record_id, field_name, file_path, file_token, success))
+
+        if remove:
+            # 同一个文件可能挂到多条记录，全部成功后才删除，且只删除一次
+            paths = {}
+            for result in results:
+                paths[result.file_path] = paths.get(result.file_path, True) and result.success
+            for file_path, success in paths.items():
+                if not success:
+                    continue
+                try:
+                    os.remove(file_path)
+                except OSError as e:
+                    print(f"删除文件失败 {file_path}: {e}")
+        print(f"批量上传完成 {sum(result.success for result in results)}/{len(results)}")
+        return results
+
+    def upload_media(self, file_path):
+        """
+        上传文件到多维表格，超过 UPLOAD_ALL_LIMIT 时分片并发上传
+        :param file_path:
+        :return: file_token，失败时返回 None
+        """
+        if os.path.getsize(file_path) > UPLOAD_ALL_LIMIT:
+            return self._upload_multipart(file_path)
+
+        file_name = os.path.basename(file_path)
+        with open(file_path, 'rb') as file:
+            def upload_request():
+                # 重试时从头读取文件
+                file.seek(0)
+                return UploadAllMediaRequest.builder() \
+                    .request_body(UploadAllMediaRequestBody.builder()
+                                  .file_name(file_name)
+                                  .parent_type("bitable_file")
+                                  .parent_node(self.token.app_token)
+                                  .size(os.path.getsize(file_path))
+                                  .file(file)
+                                  .build()) \
+                    .build()
+
+            response: UploadAllMediaResponse = self._execute(self.client.drive.v1.media.upload_all, upload_request)
+        print(f"上传文件 success! code = {response.code} msg = {response.msg}")
+
+        return getattr(response.data, 'file_token', None)
+
+    def _upload_multipart(self, file_path):
+        # 预上传，服务端决定分片大小和分片数
+        request = UploadPrepareMediaRequest.builder() \
+            .request_body(MediaUploadInfo.builder()
+                          .file_name(os.path.basename(file_path))
+                          .parent_type("bitable_file")
+                          .parent_node(self.token.app_token)
+                          .size(os.path.getsize(file_path))
+                          .build()) \
+            .build()
+        response: UploadPrepareMediaResponse = self._execute(self.client.drive.v1.media.upload_prepare, request)
+        print(f"分片上传准备 code = {response.code} msg = {response.msg}")
+        if not response.success():
+            return None
+        upload_id, block_size, block_num = response.data.upload_id, response.data.block_size, response.data.block_num
+
+        def upload_part(seq):
+            # 每个分片单独读取，内存中最多同时有 max_workers 个分片
+            with open(file_path, 'rb') as f:
+                f.seek(seq * block_size)
+                block = f.read(block_size)
+
+            def part_request():
+                return UploadPartMediaRequest.builder() \
+                    .request_body(UploadPartMediaRequestBody.builder()
+                                  .upload_id(upload_id)
+                                  .seq(seq)
+                                  .size(len(block))
+                                  .checksum(str(zlib.adler32(block)))
+                                  .file(io.BytesIO(block))
+                                  .build()) \
+                    .build()
+
+            part_response = self._execute(self.client.drive.v1.media.upload_part, part_request)
+            if not part_response.success():
+                print(f"分片 {seq} 上传失败 code = {part_response.code} msg = {part_response.msg}")
+            return part_response.success()
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, block_num))) as pool:
+            if not all(pool.map(upload_part, range(block_num))):
+                return None
+
+        request = UploadFinishMediaRequest.builder() \
+            .request_body(UploadFinishMediaRequestBody.builder()
+                          .upload_id(upload_id)
+                          .block_num(block_num)
+                          .build()) \
+            .build()
+        response: UploadFinishMediaResponse = self._execute(self.client.drive.v1.media.upload_finish, request)
+        print(f"上传文件 success! code = {response.code} msg = {response.msg} block_num = {block_num}")
+
+        return getattr(response.data, 'file_token', None)
+
+    def download(self, file_token, file_path, chunk_size=1024 * 1024):
+        """
+        流式下载文件，按 chunk_size 分块写入本地，先写到临时文件，完成后再替换
+        :param file_token:
+        :param file_path:
+        :param chunk_size:
+        """
+        url = f'{BASE_URL}/open-apis/drive/v1/medias/{file_token}/download'
+        headers = {'Authorization': f'Bearer {self.token.personal_token}'}
+        tmp_path = f'{file_path}.part'
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with requests.get(url, headers=headers, stream=True, timeout=60) as response:
+                    response.raise_for_status()
+                    with open(tmp_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size):
+                            f.write(chunk)
+                os.replace(tmp_path, file_path)
+                return
+            except requests.RequestException as e:
+                status_code = getattr(e.response, 'status_code', None)
+                # 4xx 除频率限制外不重试
+                retry = status_code is None or status_code == 429 or status_code >= 500
+                if attempt == self.max_retries or not retry:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"下载异常，{delay:.1f}s 后重试: {e}")
+                time.sleep(delay)
 
     def download_stream(self, file_token):
         # 构造请求对象
@@ -62,31 +386,54 @@ class FeishuDocClient:
             .build()
 
         # 发起请求
-        response = self.client.drive.v1.media.download(request)
+        response = self._execute(self.client.drive.v1.media.download, request)
 
         return response.file
 
     # 读取指定条数的纪录
-    def read(self, table_id, page_size=100, read_all=True):
+    def read(self, table_id, page_size=100, read_all=True, prefetch=0, field_names=None, strict=False,
+             automatic_fields=False):
+        """
+        逐条读取表格记录
+        :param table_id:
+        :param page_size: 每页条数，最大 500
+        :param read_all: 是否读取全部分页
+        :param prefetch: 后台线程预取的页数，处理当前页时并行请求后面的页，0 表示不预取
+        :param field_names: 只读取这些字段
+        :param strict: 读取失败时抛出 RuntimeError，而不是当作已经读完
+        :param automatic_fields: 返回创建时间、最后修改时间等自动字段
+        """
+        pages = self._read_pages(table_id, page_size, read_all, field_names, strict, automatic_fields)
+        if prefetch > 0:
+            pages = _prefetch(pages, prefetch)
+        for items in pages:
+            yield from items
 
+    def _read_pages(self, table_id, page_size, read_all, field_names, strict=False, automatic_fields=False):
         page_token = ''
 
         def _read():
             # 遍历记录
-            list_record_request = ListAppTableRecordRequest.builder() \
+            builder = ListAppTableRecordRequest.builder() \
                 .page_size(page_size) \
                 .table_id(table_id) \
-                .page_token(page_token) \
-                .build()
+                .page_token(page_token)
+            if field_names:
+                builder.field_names(json.dumps(list(field_names), ensure_ascii=False))
+            if automatic_fields:
+                builder.automatic_fields(True)
 
-            list_record_response = self.client.base.v1.app_table_record.list(list_record_request)
+            list_record_response = self._execute(self.client.base.v1.app_table_record.list, builder.build())
             print(f"read success! code = {list_record_response.code} msg = {list_record_response.msg}")
+            if strict and not list_record_response.success():
+                # 读到一半失败时不能当作表格只有这些记录
+                raise RuntimeError(f"read failed! code = {list_record_response.code} msg = {list_record_response.msg}")
 
             return list_record_response.data if list_record_response.success() else None
 
         while True:
             data = _read()
-            yield from getattr(data, 'items', []) or []
+            yield getattr(data, 'items', []) or []
             has_more = getattr(data, 'has_more', False)
             page_token = getattr(data, 'page_token', '')
 
@@ -101,10 +448,68 @@ class FeishuDocClient:
             .filter(predicate) \
             .build()
 
-        list_record_response = self.client.base.v1.app_table_record.list(list_record_request)
+        list_record_response = self._execute(self.client.base.v1.app_table_record.list, list_record_request)
         print(f"find end! code: {list_record_response.code} msg = {list_record_response.msg}")
         return getattr(list_record_response.data, 'items', [])
 
+    def find_all(self, table_id, predicate, page_size=BATCH_SIZE):
+        """
+        根据条件分页查找全部记录
+        :param table_id:
+        :param predicate: 过滤条件
+        :param page_size: 每页条数，最大 500
+        :return: [AppTableRecord]
+        """
+        records = []
+        page_token = ''
+        while True:
+            builder = ListAppTableRecordRequest.builder() \
+                .page_size(page_size) \
+                .table_id(table_id) \
+                .filter(predicate)
+            if page_token:
+                builder.page_token(page_token)
+
+            response = self._execute(self.client.base.v1.app_table_record.list, builder.build())
+            if not response.success():
+                # 查询失败时不能当作没有记录，否则会重复插入
+                raise RuntimeError(f"find all failed! code = {response.code} msg = {response.msg}")
+
+            data = response.data
+            records.extend(getattr(data, 'items', None) or [])
+            page_token = getattr(data, 'page_token', '')
+            if not getattr(data, 'has_more', False) or not page_token:
+                return records
+
+    def find_by_keys(self, table_id, filter_key, keys):
+        """
+        按 filter_key 查找记录，key 按 FILTER_KEY_SIZE 分组生成过滤条件，各组并发分页查询
+        :param table_id:
+        :param filter_key: 字段名
+        :param keys: 要查找的字段值
+        :return: {字段值: AppTableRecord}
+        """
+        keys = list(dict.fromkeys(keys))
+        predicates = []
+        for i in range(0, len(keys), FILTER_KEY_SIZE):
+            conditions = [f'CurrentValue.[{filter_key}] = "{_filter_value(key)}"'
+                          for key in keys[i:i + FILTER_KEY_SIZE]]
+            predicates.append(f"OR({','.join(conditions)})")
+
+        if len(predicates) <= 1 or self.max_workers <= 1:
+            pages = [self.find_all(table_id, predicate) for predicate in predicates]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(predicates))) as pool:
+                pages = list(pool.map(lambda predicate: self.find_all(table_id, predicate), predicates))
+
+        # 根据 filter_key 把记录映射到 map
+        record_map = {}
+        for records in pages:
+            for record in records:
+                if record.fields and filter_key in record.fields:
+                    record_map[field_key(record.fields[filter_key])] = record
+        return record_map
+
     def find_with_params(self, table_id, predicate="", page_size=100, sort=""):
         list_record_request = ListAppTableRecordRequest.builder() \
             .page_size(page_size) \
@@ -113,100 +518,182 @@ class FeishuDocClient:
             .sort(sort) \
             .build()
 
-        list_record_response = self.client.base.v1.app_table_record.list(list_record_request)
+        list_record_response = self._execute(self.client.base.v1.app_table_record.list, list_record_request)
         print(f"find end! code = {list_record_response.code} msg = {list_record_response.msg}")
         return getattr(list_record_response.data, 'items', [])
 
     def update(self, table_id, records_need_update):
         """
-        批量更新记录
+        批量更新记录，超过 batch_size 时自动分片并发更新
         :param table_id:
         :param records_need_update: [{"record_id": record_id,"fields": item}]
-        :return:
+        :return: BatchResult
         """
-        # 批量更新记录
-        batch_update_records_request = BatchUpdateAppTableRecordRequest().builder() \
-            .table_id(table_id) \
-            .request_body(
-            BatchUpdateAppTableRecordRequestBody.builder()
-            .records(records_need_update)
-            .build()
-        ).build()
-        response = self.client.base.v1.app_table_record.batch_update(batch_update_records_request)
-        print(f'update end ! code:{response.code} {response.msg} size: {len(records_need_update)}')
-        return response.success()
+
+        def send(index, chunk):
+            # 批量更新记录
+            batch_update_records_request = BatchUpdateAppTableRecordRequest().builder() \
+                .table_id(table_id) \
+                .request_body(
+                BatchUpdateAppTableRecordRequestBody.builder()
+                .records(chunk)
+                .build()
+            ).build()
+            response = self._execute(self.client.base.v1.app_table_record.batch_update, batch_update_records_request)
+            print(f'update end ! code:{response.code} {response.msg} size: {len(chunk)}')
+            return ChunkResult(index, chunk, response)
+
+        result = self._dispatch(records_need_update, send)
+        index, records = self._succeeded_records(table_id, result)
+        if index is not None:
+            index.update_records(records)
+        return result
 
     def insert(self, table_id, records_need_insert):
         """
-        批量插入记录
+        批量插入记录，超过 batch_size 时自动分片并发插入
         :param table_id:
         :param records_need_insert: [{"fields": item}]
-        :return:
+        :return: BatchResult
         """
-        batch_insert_records_request = BatchCreateAppTableRecordRequest().builder() \
-            .table_id(table_id) \
-            .request_body(
-            BatchCreateAppTableRecordRequestBody.builder()
-            .records(records_need_insert)
-            .build()
-        ).build()
-        response = self.client.base.v1.app_table_record.batch_create(batch_insert_records_request)
-        print(f'insert end ! code:{response.code} {response.msg} size:{len(records_need_insert)}')
-        return response.success()
+
+        def send(index, chunk):
+            builder = BatchCreateAppTableRecordRequest().builder() \
+                .table_id(table_id) \
+                .request_body(
+                BatchCreateAppTableRecordRequestBody.builder()
+                .records(chunk)
+                .build()
+            )
+            # 同一分片重试时使用相同的 client_token，服务端据此去重，避免重复插入
+            if hasattr(builder, 'client_token'):
+                builder.client_token(str(uuid.uuid4()))
+            batch_insert_records_request = builder.build()
+            response = self._execute(self.client.base.v1.app_table_record.batch_create, batch_insert_records_request)
+            print(f'insert end ! code:{response.code} {response.msg} size:{len(chunk)}')
+            return ChunkResult(index, chunk, response)
+
+        result = self._dispatch(records_need_insert, send)
+        index = self.indexes.get(table_id)
+        if index is not None and index.built_at is not None:
+            index.add_records(result.created)
+        return result
 
     def delete(self, table_id, records):
-        batch_delete_records_request = BatchDeleteAppTableRecordRequest().builder() \
-            .table_id(table_id) \
-            .request_body(
-            BatchDeleteAppTableRecordRequestBody.builder()
-            .records(records)
-            .build()
-        ).build()
-        batch_delete_records_response = self.client.base.v1.app_table_record.batch_delete(batch_delete_records_request)
-        print(f'delete end! {batch_delete_records_response.code} {batch_delete_records_response.msg}')
+        """
+        批量删除记录，超过 batch_size 时自动分片并发删除
+        :param table_id:
+        :param records: [record_id]
+        :return: BatchResult
+        """
+
+        def send(index, chunk):
+            batch_delete_records_request = BatchDeleteAppTableRecordRequest().builder() \
+                .table_id(table_id) \
+                .request_body(
+                BatchDeleteAppTableRecordRequestBody.builder()
+                .records(chunk)
+                .build()
+            ).build()
+            batch_delete_records_response = self._execute(self.client.base.v1.app_table_record.batch_delete,
+                                                          batch_delete_records_request)
+            print(f'delete end! {batch_delete_records_response.code} {batch_delete_records_response.msg}')
+            return ChunkResult(index, chunk, batch_delete_records_response)
+
+        result = self._dispatch(records, send)
+        index, record_ids = self._succeeded_records(table_id, result)
+        if index is not None:
+            index.remove_records(record_ids)
+        return result
 
     # 覆盖更新，适用条数较少的表格
     def insert_with_clear(self, table_id, records_need_insert):
-        records = self.read(table_id)
+        index = self._index(table_id)
+        if index is not None:
+            record_ids = index.record_ids()
+        else:
+            record_ids = [record.record_id for record in self.read(table_id)]
 
         # 插入
         self.insert(table_id, [{'fields': record} for record in records_need_insert])
 
         # 清空表
-        if records:
-            self.delete(table_id, [record.record_id for record in records])
+        if record_ids:
+            self.delete(table_id, record_ids)
 
     # 合并更新，多余的插入
     def update_by_zip(self, table_id, records_need_insert):
-        records = list(self.read(table_id))
-        if records:
+        """
+        按表格顺序逐条覆盖记录，多余的插入
+        开启索引时只从索引取 record_id，不读取云端字段，因此每条记录都会重新写入；
+        没有索引时读取全表，跳过字段没有变化的记录
+        """
+        index = self._index(table_id)
+        if index is not None:
+            record_ids = index.record_ids()
+            want_update = records_need_insert[:len(record_ids)]
+            # 批量更新只修改传入的字段，不需要合并云端字段
+            updated = [{'record_id': record_id, 'fields': want} for want, record_id in zip(want_update, record_ids)]
+            want_insert = records_need_insert[len(record_ids):]
+        else:
+            records = [(record.record_id, record.fields or {}) for record in self.read(table_id)]
             want_update = records_need_insert[:len(records)]
+            # 更新，跳过字段没有变化的记录
+            updated = [{'record_id': record_id, 'fields': {**fields, **want}} for want, (record_id, fields) in
+                       zip(want_update, records) if _fields_hash(want, want) != _fields_hash(fields, want)]
             want_insert = records_need_insert[len(records):]
 
-            # 更新
-            updated = [{'record_id': cloud.record_id, 'fields': {**cloud.fields, **want}} for want, cloud in
-                       zip(want_update, records)]
-
-            if updated:
-                self.update(table_id, updated)
-        else:
-            want_insert = records_need_insert
+        if updated:
+            self.update(table_id, updated)
         # 插入
         if want_insert:
             self.insert(table_id, [{'fields': record} for record in want_insert])
 
-    # 批量更新记录或插入记录
-    def insert_or_update_all(self, table_id, data: Dict, filter_key, function):
-        filter_value = map(lambda x: f"CurrentValue.[{filter_key}] = \"{x}\"", data.keys())
-        list_filter = f"OR({','.join(filter_value)})"
+    def sync_table(self, table_id, rows: List[Dict], key):
+        """
+        把表格同步成 rows：只插入新增的记录、更新字段有变化的记录、删除多余的记录（包括 key 重复的记录）
+        :param table_id:
+        :param rows: [fields]，key 相同时以最后一条为准
+        :param key: 唯一标识记录的字段名
+        :return: (insert_result, update_result, delete_result)
+        """
+        wanted = {row[key]: row for row in rows}
+        names = {name for row in rows for name in row} | {key}
+
+        # 只读取需要比较的字段，读取不完整时直接失败，避免重复插入和漏删
+        cloud = {}
+        deleted = []
+        for record in self.read(table_id, page_size=BATCH_SIZE, prefetch=2, field_names=sorted(names), strict=True):
+            record_key = field_key((record.fields or {}).get(key))
+            if record_key in wanted and record_key not in cloud:
+                cloud[record_key] = record
+            else:
+                deleted.append(record.record_id)
 
-        records = self.find(table_id, list_filter)
+        inserted = []
+        updated = []
+        for row_key, row in wanted.items():
+            record = cloud.get(row_key)
+            if record is None:
+                inserted.append({"fields": row})
+            elif _fields_hash(row, row) != _fields_hash(record.fields, row):
+                updated.append({"record_id": record.record_id, "fields": row})
+        print(f"sync {table_id}: insert {len(inserted)} update {len(updated)} delete {len(deleted)} "
+              f"unchanged {len(cloud) - len(updated)}")
+
+        insert_result = self.insert(table_id, inserted) if inserted else True
+        update_result = self.update(table_id, updated) if updated else True
+        delete_result = self.delete(table_id, deleted) if deleted else True
+        return insert_result, update_result, delete_result
 
-        # 根据filter_key把记录映射到map
-        if records:
-            record_map = {record.fields[filter_key]: record for record in records if record.fields}
-        else:
-            record_map = {}
+    # 批量更新记录或插入记录
+    def insert_or_update_all(self, table_id, data: Dict, filter_key, function):
+        keys = list(data.keys())
+        index = self._index(table_id, filter_key)
+        if index is not None:
+            # 索引里没有的 key 一定是新记录，不需要查询
+            keys = [key for key in keys if key in index]
+        record_map = self.find_by_keys(table_id, filter_key, keys)
 
         # 填充数据
         inserted = []
@@ -229,20 +716,16 @@ class FeishuDocClient:
         if updated:
             self.update(table_id, updated)
 
-    # 小批量更新记录或插入记录（最大size=100）
+    # 批量更新记录或插入记录
     def insert_or_update(self, table_id, data: List[Dict], filter_key, skip_update=False):
-        filter_value = [f"CurrentValue.[{filter_key}] = \"{item[filter_key]}\"" for item in data]
-        list_filter = f"OR({','.join(filter_value)})"
-
-        records = self.find(table_id, list_filter)
-
-        # 找到
-        if records:
-            print(f"find {len(records)} records")
-            record_map = {record.fields[filter_key]: record for record in records if record.fields}
+        keys = [item[filter_key] for item in data]
+        index = self._index(table_id, filter_key)
+        if index is not None:
+            record_map = {key: index.record_id(key) for key in keys if key in index}
         else:
-            print(f"find 0 records")
-            record_map = {}
+            record_map = {key: record.record_id
+                          for key, record in self.find_by_keys(table_id, filter_key, keys).items()}
+        print(f"find {len(record_map)} records")
 
         # 填充数据
         inserted = []
@@ -250,7 +733,7 @@ class FeishuDocClient:
 
         for item in data:
             if item[filter_key] in record_map:
-                updated.append({"record_id": record_map[item[filter_key]].record_id, "fields": item})
+                updated.append({"record_id": record_map[item[filter_key]], "fields": item})
             else:
                 inserted.append({"fields": item})
 
@@ -269,24 +752,30 @@ class FeishuDocClient:
 
     #  去重
     def distinct(self, table_id, filter_key):
-        records = list(self.read(table_id))
+        index = self._index(table_id, filter_key)
+        if index is not None:
+            duplicates = index.duplicates()
+        else:
+            duplicates = self._duplicates(table_id, filter_key)
+
+        # 删除重复记录
+        if duplicates:
+            self.delete(table_id, duplicates)
+            print(f"已删除 {len(duplicates)} 条重复记录")
+        else:
+            print("未发现重复记录")
 
+    def _duplicates(self, table_id, filter_key):
         # 使用字典来跟踪已经见过的值
         seen = {}
         duplicates = []
 
         # 遍历记录，找出重复项
-        for record in records:
+        for record in self.read(table_id):
             if record.fields and filter_key in record.fields:
                 key_value = record.fields[filter_key]
                 if key_value in seen:
                     duplicates.append(record.record_id)
                 else:
                     seen[key_value] = record.record_id
-
-        # 删除重复记录
-        if duplicates:
-            self.delete(table_id, duplicates)
-            print(f"已删除 {len(duplicates)} 条重复记录")
-        else:
-            print("未发现重复记录")
+        return duplicates
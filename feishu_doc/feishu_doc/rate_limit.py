@@ -0,0 +1,53 @@
+import random
+import threading
+import time
+
+# 需要重试的飞书错误码：频率限制、写冲突、数据未就绪、服务端超时等临时错误
+RETRY_CODES = {
+    99991400,  # 应用请求频率超限
+    1254290,  # TooManyRequest
+    1254291,  # Write conflict
+    1254607,  # Data not ready
+    1255040,  # 请求超时
+}
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶，用于客户端限流
+    :param rate: 每秒生成的令牌数，即平均 QPS
+    :param capacity: 桶容量，即允许的突发请求数，默认等于 rate
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，没有令牌时阻塞等待"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 令牌可以透支，等待时间按排队顺序累加
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """第 attempt 次重试前的等待时间：指数退避加全抖动"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def should_retry(response):
+    """频率限制、临时错误码和 5xx 需要重试"""
+    if response.code in RETRY_CODES:
+        return True
+    status_code = getattr(getattr(response, 'raw', None), 'status_code', None)
+    return status_code is not None and status_code >= 500
@@ -0,0 +1,194 @@
+import itertools
+import json
+import sqlite3
+import threading
+import time
+
+
+def field_key(value):
+    """字段值转成可以做字典 key 的值，文本字段可能返回 [{"text": ..., "type": "text"}]"""
+    if isinstance(value, list):
+        return ''.join(item.get('text', '') if isinstance(item, dict) else str(item) for item in value)
+    return value
+
+
+def _record_parts(record):
+    """兼容 AppTableRecord 和 {"record_id": ..., "fields": ...}"""
+    if isinstance(record, dict):
+        return record.get('record_id'), record.get('fields') or {}, record.get('last_modified_time')
+    return record.record_id, record.fields or {}, getattr(record, 'last_modified_time', None)
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class TableIndex:
+    """
+    多维表格的本地索引：key 字段值 -> record_id 和最后修改时间，按表格读取顺序保存。
+    由 FeishuDocClient 的 insert/update/delete 维护，超过 ttl 秒后重新读取全表。
+    :param table_id:
+    :param key_field: 建索引的字段名
+    :param ttl: 有效期（秒），None 表示一直有效
+    :param sqlite_path: 持久化到 SQLite 文件，下次运行时在有效期内直接加载
+    """
+
+    def __init__(self, table_id, key_field, ttl=None, sqlite_path=None):
+        self.table_id = table_id
+        self.key_field = key_field
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path
+        self.built_at = None
+        # key -> {record_id: 修改时间}，同一个 key 可能对应多条记录
+        self._keys = {}
+        # record_id -> (key, 顺序号)
+        self._records = {}
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        if sqlite_path:
+            self._load()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    @property
+    def fresh(self):
+        """索引已建立且没有过期"""
+        if self.built_at is None:
+            return False
+        return self.ttl is None or time.time() - self.built_at < self.ttl
+
+    def invalidate(self):
+        """标记过期，下次使用时重新读取全表"""
+        self.built_at = None
+
+    def record_id(self, key):
+        """key 对应的第一条记录的 record_id，没有时返回 None"""
+        record_ids = self._keys.get(key)
+        return next(iter(record_ids)) if record_ids else None
+
+    def record_ids(self, key=None):
+        """key 对应的全部 record_id，key 为 None 时返回全表 record_id"""
+        with self._lock:
+            if key is not None:
+                return list(self._keys.get(key, ()))
+            return sorted(self._records, key=lambda record_id: self._records[record_id][1])
+
+    def modified_time(self, record_id):
+        key, _ = self._records[record_id]
+        return self._keys[key][record_id]
+
+    def duplicates(self):
+        """重复 key 的多余记录，每个 key 保留第一条，没有 key 字段的记录不算重复"""
+        with self._lock:
+            return [record_id for key, record_ids in self._keys.items() if key is not None
+                    for record_id in list(record_ids)[1:]]
+
+    def rebuild(self, records):
+        """用全表记录重建索引"""
+        with self._lock:
+            self._keys = {}
+            self._records = {}
+            self._seq = itertools.count()
+            rows = [self._add(*_record_parts(record)) for record in records]
+            self.built_at = time.time()
+            self._persist(rows, clear=True)
+
+    def add_records(self, records):
+        """新插入的记录"""
+        with self._lock:
+            self._persist([self._add(*_record_parts(record)) for record in records])
+
+    def update_records(self, records):
+        """更新过的记录，key 字段变化时移到新 key 下"""
+        with self._lock:
+            rows = []
+            for record in records:
+                record_id, fields, modified = _record_parts(record)
+                if record_id not in self._records:
+                    continue
+                if self.key_field in fields:
+                    # _add 会从旧 key 下移除记录并保留原来的顺序号
+                    rows.append(self._add(record_id, fields, modified))
+                else:
+                    key, seq = self._records[record_id]
+                    self._keys[key][record_id] = modified or _now_ms()
+                    rows.append((record_id, key, self._keys[key][record_id], seq))
+            self._persist(rows)
+
+    def remove_records(self, record_ids):
+        """已删除的记录"""
+        with self._lock:
+            removed = [record_id for record_id in record_ids if self._remove(record_id)]
+            self._persist([], removed)
+
+    def _add(self, record_id, fields, modified=None):
+        key = field_key(fields.get(self.key_field))
+        modified = modified or _now_ms()
+        seq = self._records[record_id][1] if record_id in self._records else next(self._seq)
+        self._remove(record_id)
+        self._keys.setdefault(key, {})[record_id] = modified
+        self._records[record_id] = (key, seq)
+        return record_id, key, modified, seq
+
+    def _remove(self, record_id):
+        if record_id not in self._records:
+            return False
+        key, _ = self._records.pop(record_id)
+        record_ids = self._keys[key]
+        record_ids.pop(record_id, None)
+        if not record_ids:
+            del self._keys[key]
+        return True
+
+    def _connect(self):
+        conn = sqlite3.connect(self.sqlite_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS table_index (table_id TEXT, key_field TEXT, record_id TEXT, '
+                     'key TEXT, modified INTEGER, seq INTEGER, PRIMARY KEY (table_id, key_field, record_id))')
+        conn.execute('CREATE TABLE IF NOT EXISTS table_index_meta (table_id TEXT, key_field TEXT, built_at REAL, '
+                     'PRIMARY KEY (table_id, key_field))')
+        return conn
+
+    def _load(self):
+        conn = self._connect()
+        try:
+            meta = conn.execute('SELECT built_at FROM table_index_meta WHERE table_id = ? AND key_field = ?',
+                                (self.table_id, self.key_field)).fetchone()
+            if meta is None:
+                return
+            rows = conn.execute('SELECT record_id, key, modified, seq FROM table_index '
+                                'WHERE table_id = ? AND key_field = ? ORDER BY seq',
+                                (self.table_id, self.key_field)).fetchall()
+        finally:
+            conn.close()
+
+        last_seq = -1
+        for record_id, key, modified, seq in rows:
+            # key 保存为 JSON，保留数字等类型
+            key = json.loads(key)
+            self._keys.setdefault(key, {})[record_id] = modified
+            self._records[record_id] = (key, seq)
+            last_seq = seq
+        self._seq = itertools.count(last_seq + 1)
+        self.built_at = meta[0]
+
+    def _persist(self, rows, removed=(), clear=False):
+        if not self.sqlite_path:
+            return
+        scope = (self.table_id, self.key_field)
+        conn = self._connect()
+        try:
+            with conn:
+                if clear:
+                    conn.execute('DELETE FROM table_index WHERE table_id = ? AND key_field = ?', scope)
+                    conn.execute('INSERT OR REPLACE INTO table_index_meta VALUES (?, ?, ?)', (*scope, self.built_at))
+                conn.executemany('INSERT OR REPLACE INTO table_index VALUES (?, ?, ?, ?, ?, ?)',
+                                 [(*scope, record_id, json.dumps(key, ensure_ascii=False), modified, seq)
+                                  for record_id, key, modified, seq in rows])
+                conn.executemany('DELETE FROM table_index WHERE table_id = ? AND key_field = ? AND record_id = ?',
+                                 [(*scope, record_id) for record_id in removed])
+        finally:
+            conn.close()
@@ -4,7 +4,10 @@ setup(
     name="feishu_doc",
     version="1.0.0",
     packages=find_packages(),
-    install_requires=["baseopensdk@https://lf3-static.bytednsdoc.com/obj/eden-cn/lmeh7phbozvhoz/base-open-sdk/baseopensdk-0.0.13-py3-none-any.whl"],  # 如果有依赖包，可以在这里列出
+    install_requires=["baseopensdk@https://lf3-static.bytednsdoc.com/obj/eden-cn/lmeh7phbozvhoz/base-open-sdk/baseopensdk-0.0.13-py3-none-any.whl", "requests"],  # 如果有依赖包，可以在这里列出
+    extras_require={
+        'async': ['aiohttp'],
+    },
     author="br3ant",
     author_email="houqiqi@zepp.com",
     description="飞书Base Doc的封装",
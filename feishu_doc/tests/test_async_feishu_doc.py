@@ -0,0 +1,89 @@
+import asyncio
+import itertools
+import unittest
+
+from aiohttp import web
+
+from feishu_doc import AsyncFeishuDocClient, FeishuToken
+
+APP_TOKEN = "app_token"
+table_id = "tbl_test"
+
+
+def stub_app():
+    """本地模拟 bitable 记录接口"""
+    records = {}
+    ids = itertools.count(1)
+    prefix = f'/open-apis/bitable/v1/apps/{APP_TOKEN}/tables/{{table_id}}/records'
+
+    async def list_records(request):
+        page_size = int(request.query.get('page_size', 100))
+        start = int(request.query.get('page_token') or 0)
+        items = list(records.values())[start:start + page_size]
+        has_more = start + page_size < len(records)
+        return web.json_response({'code': 0, 'msg': 'success', 'data': {
+            'items': items, 'has_more': has_more, 'page_token': str(start + page_size) if has_more else '',
+            'total': len(records)}})
+
+    async def batch_create(request):
+        body = await request.json()
+        created = []
+        for record in body['records']:
+            record_id = f'rec{next(ids)}'
+            records[record_id] = {'record_id': record_id, 'fields': record['fields']}
+            created.append(records[record_id])
+        return web.json_response({'code': 0, 'msg': 'success', 'data': {'records': created}})
+
+    async def batch_update(request):
+        body = await request.json()
+        for record in body['records']:
+            records[record['record_id']]['fields'].update(record['fields'])
+        return web.json_response({'code': 0, 'msg': 'success', 'data': {'records': body['records']}})
+
+    async def batch_delete(request):
+        body = await request.json()
+        for record_id in body['records']:
+            records.pop(record_id, None)
+        return web.json_response({'code': 0, 'msg': 'success', 'data': {}})
+
+    app = web.Application()
+    app.router.add_get(prefix, list_records)
+    app.router.add_post(prefix + '/batch_create', batch_create)
+    app.router.add_post(prefix + '/batch_update', batch_update)
+    app.router.add_post(prefix + '/batch_delete', batch_delete)
+    return app
+
+
+class TestAsyncFeishuDoc(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.runner = web.AppRunner(stub_app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.client = AsyncFeishuDocClient(FeishuToken(APP_TOKEN, "pt-test"), max_concurrency=4,
+                                           base_url=f'http://127.0.0.1:{port}')
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def test_insert_update_delete(self):
+        batches = [[{"fields": {"id": f"{i}-{j}"}} for j in range(10)] for i in range(5)]
+        results = await asyncio.gather(*(self.client.insert(table_id, batch) for batch in batches))
+        self.assertEqual(results, [True] * 5)
+
+        records = [record async for record in self.client.read(table_id, page_size=7)]
+        self.assertEqual(len(records), 50)
+
+        updated = [{"record_id": record['record_id'], "fields": {"error_info": "error"}} for record in records]
+        self.assertTrue(await self.client.update(table_id, updated))
+        self.assertEqual((await self.client.find(table_id, ''))[0]['fields']['error_info'], "error")
+
+        self.assertTrue(await self.client.delete(table_id, [record['record_id'] for record in records]))
+        self.assertEqual([record async for record in self.client.read(table_id)], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,9 +14,38 @@ class TestFeushuDoc(unittest.TestCase):
                                                            {"id": "222", "error_info": "error_2"}], "id")
         self.assertEqual(result, (True, True))
 
+    def test_insert_or_update_many(self):
+        # 超过单页 100 条和单个过滤条件的 key 数
+        data = [{"id": f"upsert_{i}", "error_info": "error_1"} for i in range(120)]
+        data.append({"id": 'quote"1', "error_info": "error_1"})
+        self.assertEqual(feishu_client.insert_or_update(table_id, data, "id"), (True, True))
+        records = feishu_client.find_by_keys(table_id, "id", [item["id"] for item in data])
+        self.assertEqual(len(records), len(data))
+
+    def test_index(self):
+        client = FeishuDocClient(feishu_client.token)
+        index = client.enable_index(table_id, "id", ttl=600)
+        result = client.insert_or_update(table_id, [{"id": "index_1", "error_info": "error_1"}], "id")
+        self.assertEqual(result, (True, True))
+        self.assertIn("index_1", index)
+        self.assertTrue(client.delete(table_id, index.record_ids("index_1")))
+        self.assertNotIn("index_1", index)
+
     def test_insert(self):
         result = feishu_client.insert(table_id, [{"fields": {"id": "abc", "error_info": "error_1"}}])
         self.assertEqual(result, True)
 
+    def test_insert_chunked(self):
+        client = FeishuDocClient(feishu_client.token, batch_size=2)
+        result = client.insert(table_id, [{"fields": {"id": f"chunk_{i}", "error_info": "error_1"}} for i in range(5)])
+        self.assertEqual(result, True)
+        self.assertEqual(len(result.chunks), 3)
+        self.assertEqual(result.failed_records, [])
+
+    def test_read_prefetch(self):
+        records = list(feishu_client.read(table_id, page_size=20))
+        prefetched = list(feishu_client.read(table_id, page_size=20, prefetch=2, field_names=["id"]))
+        self.assertEqual([record.record_id for record in prefetched], [record.record_id for record in records])
+
     def test_distinct(self):
         feishu_client.distinct(table_id, 'id')
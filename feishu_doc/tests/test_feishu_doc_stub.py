@@ -0,0 +1,302 @@
+import http.server
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import threading
+import types
+import unittest
+import zlib
+from unittest import mock
+
+import requests
+
+from feishu_doc import FeishuDocClient, FeishuToken
+
+table_id = "tbl_test"
+
+
+class StubResponse:
+    def __init__(self, code=0, msg="success", data=None):
+        self.code = code
+        self.msg = msg
+        self.data = data
+
+    def success(self):
+        return self.code == 0
+
+
+class StubBitable:
+    """内存中模拟 SDK 的多维表格接口，替换 FeishuDocClient.client，不发网络请求"""
+
+    def __init__(self):
+        # record_id -> fields，按插入顺序即表格顺序
+        self.records = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        # 每次调用的接口名
+        self.calls = []
+        # 返回失败的接口名
+        self.failing = set()
+        # file_token -> 上传的文件内容
+        self.files = {}
+        # upload_id -> {seq: 分片内容}
+        self.uploads = {}
+
+    def install(self, client):
+        client.client = types.SimpleNamespace(
+            base=types.SimpleNamespace(v1=types.SimpleNamespace(app_table_record=self)),
+            drive=types.SimpleNamespace(v1=types.SimpleNamespace(media=self)))
+        return client
+
+    def _failed(self, name):
+        with self.lock:
+            self.calls.append(name)
+        return name in self.failing
+
+    def _record(self, record_id):
+        return types.SimpleNamespace(record_id=record_id, fields=dict(self.records[record_id]),
+                                     last_modified_time=None)
+
+    def list(self, request):
+        if self._failed("list"):
+            return StubResponse(1254000, "fail")
+        record_ids = list(self.records)
+        if request.filter:
+            # 只支持 find_by_keys 生成的 OR(CurrentValue.[字段] = "值") 条件
+            conditions = re.findall(r'CurrentValue\.\[(.+?)\] = "((?:[^"\\]|\\.)*)"', request.filter)
+            record_ids = [record_id for record_id in record_ids
+                          if any(str(self.records[record_id].get(name)) == value.replace('\\"', '"')
+                                 for name, value in conditions)]
+        start = int(request.page_token or 0)
+        page_size = request.page_size or 20
+        has_more = start + page_size < len(record_ids)
+        return StubResponse(data=types.SimpleNamespace(
+            items=[self._record(record_id) for record_id in record_ids[start:start + page_size]],
+            has_more=has_more, page_token=str(start + page_size) if has_more else "", total=len(record_ids)))
+
+    def batch_create(self, request):
+        if self._failed("batch_create"):
+            return StubResponse(1254000, "fail")
+        created = []
+        with self.lock:
+            for record in request.request_body.records:
+                record_id = f"rec{next(self.ids)}"
+                self.records[record_id] = dict(record["fields"])
+                created.append(self._record(record_id))
+        return StubResponse(data=types.SimpleNamespace(records=created))
+
+    def batch_update(self, request):
+        if self._failed("batch_update"):
+            return StubResponse(1254000, "fail")
+        if any(record["record_id"] not in self.records for record in request.request_body.records):
+            return StubResponse(1254043, "RecordIdNotFound")
+        with self.lock:
+            for record in request.request_body.records:
+                self.records[record["record_id"]].update(record["fields"])
+        return StubResponse(data=types.SimpleNamespace(records=request.request_body.records))
+
+    def batch_delete(self, request):
+        if self._failed("batch_delete"):
+            return StubResponse(1254000, "fail")
+        with self.lock:
+            for record_id in request.request_body.records:
+                self.records.pop(record_id, None)
+        return StubResponse(data=types.SimpleNamespace(records=[]))
+
+    def upload_all(self, request):
+        if self._failed("upload_all"):
+            return StubResponse(1061001, "fail")
+        return StubResponse(data=types.SimpleNamespace(file_token=self._save_file(request.request_body.file.read())))
+
+    def upload_prepare(self, request):
+        if self._failed("upload_prepare"):
+            return StubResponse(1061001, "fail")
+        block_size = 4
+        upload_id = f"upload{next(self.ids)}"
+        self.uploads[upload_id] = {}
+        return StubResponse(data=types.SimpleNamespace(
+            upload_id=upload_id, block_size=block_size, block_num=-(-request.request_body.size // block_size)))
+
+    def upload_part(self, request):
+        body = request.request_body
+        content = body.file.read()
+        if self._failed("upload_part") or str(zlib.adler32(content)) != body.checksum or len(content) != body.size:
+            return StubResponse(1061002, "fail")
+        with self.lock:
+            self.uploads[body.upload_id][body.seq] = content
+        return StubResponse()
+
+    def upload_finish(self, request):
+        if self._failed("upload_finish"):
+            return StubResponse(1061001, "fail")
+        parts = self.uploads.pop(request.request_body.upload_id)
+        if sorted(parts) != list(range(request.request_body.block_num)):
+            return StubResponse(1061003, "missing parts")
+        content = b"".join(parts[seq] for seq in sorted(parts))
+        return StubResponse(data=types.SimpleNamespace(file_token=self._save_file(content)))
+
+    def _save_file(self, content):
+        with self.lock:
+            file_token = f"file{next(self.ids)}"
+            self.files[file_token] = content
+        return file_token
+
+
+def serve_files(files, failures):
+    """本地下载服务，files: file_token -> 内容，failures: 每个 file_token 先返回的错误状态码"""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            file_token = self.path.split("/")[-2]
+            if failures.get(file_token):
+                self.send_error(failures[file_token].pop(0))
+                return
+            content = files[file_token]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TestFeishuDocStub(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubBitable()
+        self.client = self.stub.install(FeishuDocClient(FeishuToken("app_token", "pt-test"), qps=1000))
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_file(self, name, content):
+        file_path = os.path.join(self.tmp_dir, name)
+        with open(file_path, 'wb') as f:
+            f.write(content)
+        return file_path
+
+    def test_index_order_after_update(self):
+        self.client.insert(table_id, [{"fields": {"id": f"k{i}"}} for i in range(4)])
+        index = self.client.enable_index(table_id, "id")
+        # key 不变的更新不能改变记录在索引中的顺序
+        self.assertEqual(self.client.insert_or_update(table_id, [{"id": "k1", "error_info": "error_1"}], "id"),
+                         (True, True))
+        self.assertEqual(index.record_ids(), [record.record_id for record in self.client.read(table_id)])
+
+        # 按索引顺序逐条覆盖前 3 条记录
+        self.client.update_by_zip(table_id, [{"id": "z0"}, {"id": "z1"}, {"id": "z2"}])
+        self.assertEqual([fields["id"] for fields in self.stub.records.values()], ["z0", "z1", "z2", "k3"])
+
+    def test_sync_table(self):
+        # 表格里原有的记录，包括重复 key 和多余记录
+        self.client.insert(table_id, [{"fields": {"id": "sync_0", "error_info": "old"}},
+                                      {"fields": {"id": "sync_0", "error_info": "old"}},
+                                      {"fields": {"id": "sync_1", "error_info": "error_1"}},
+                                      {"fields": {"id": "other", "error_info": "error_1"}}])
+        rows = [{"id": f"sync_{i}", "error_info": "error_1"} for i in range(3)]
+        self.assertEqual(self.client.sync_table(table_id, rows, "id"), (True, True, True))
+        self.assertEqual(sorted(self.stub.records.values(), key=lambda fields: fields["id"]), rows)
+
+        # 没有变化时不发写请求
+        self.stub.calls.clear()
+        self.assertEqual(self.client.sync_table(table_id, rows, "id"), (True, True, True))
+        self.assertEqual(self.stub.calls, ["list"])
+
+    def test_sync_table_read_failed(self):
+        rows = [{"id": f"sync_{i}", "error_info": "error_1"} for i in range(5)]
+        self.client.sync_table(table_id, rows, "id")
+        # 读取失败时不能当作空表重新插入
+        self.stub.failing.add("list")
+        with self.assertRaises(RuntimeError):
+            self.client.sync_table(table_id, rows, "id")
+        self.assertEqual(len(self.stub.records), 5)
+
+    def test_sync_non_text_fields(self):
+        rows = [{"id": "a", "owner": [{"id": "ou_1"}], "files": [{"file_token": "x"}]}]
+        self.client.sync_table(table_id, rows, "id")
+        self.stub.calls.clear()
+        # 没有变化时只读取不写入
+        self.assertEqual(self.client.sync_table(table_id, rows, "id"), (True, True, True))
+        self.assertEqual(self.stub.calls, ["list"])
+
+        # 人员、附件字段没有 text，变化也要写入
+        changed = [{"id": "a", "owner": [{"id": "ou_2"}], "files": [{"file_token": "y"}]}]
+        self.client.sync_table(table_id, changed, "id")
+        self.assertEqual(list(self.stub.records.values()), changed)
+
+        self.client.update_by_zip(table_id, [{"id": "a", "owner": [{"id": "ou_3"}]}])
+        self.assertEqual(list(self.stub.records.values())[0]["owner"], [{"id": "ou_3"}])
+
+    def test_upload_many_shared_file(self):
+        record_1, record_2 = [record.record_id for record in self.client.insert(
+            table_id, [{"fields": {"id": "a"}}, {"fields": {"id": "b"}}]).created]
+        shared = self.write_file("shared.log", b"shared")
+        solo = self.write_file("solo.log", b"solo")
+
+        # 同一个文件挂到两条记录，全部成功后只删除一次
+        results = self.client.upload_many([(table_id, record_1, "files", shared), (table_id, record_2, "files", shared),
+                                           (table_id, record_1, "files", solo)], remove=True)
+        self.assertEqual([result.success for result in results], [True, True, True])
+        self.assertFalse(os.path.exists(shared) or os.path.exists(solo))
+        self.assertEqual(len(self.stub.records[record_1]["files"]), 2)
+        self.assertEqual(self.stub.files[self.stub.records[record_2]["files"][0]["file_token"]], b"shared")
+
+        # 有一条记录更新失败时保留文件
+        kept = self.write_file("kept.log", b"kept")
+        items = [(table_id, record_1, "files", kept), ("tbl_other", "rec_missing", "files", kept)]
+        results = self.client.upload_many(items, remove=True)
+        self.assertEqual([result.success for result in results], [True, False])
+        self.assertTrue(os.path.exists(kept))
+
+    def test_upload_many_failed_upload(self):
+        record_id = self.client.insert(table_id, [{"fields": {"id": "a"}}]).created[0].record_id
+        file_path = self.write_file("a.log", b"a")
+        self.stub.failing.add("upload_all")
+        results = self.client.upload_many([(table_id, record_id, "files", file_path)], remove=True)
+        self.assertEqual([(result.file_token, result.success) for result in results], [(None, False)])
+        # 上传失败时不更新记录，也不删除文件
+        self.assertNotIn("batch_update", self.stub.calls)
+        self.assertTrue(os.path.exists(file_path))
+
+    def test_upload_multipart(self):
+        content = os.urandom(37)
+        file_path = self.write_file("large.bin", content)
+        # 超过上限时走分片上传，stub 按 4 字节分片
+        with mock.patch("feishu_doc.feishu_doc_api.UPLOAD_ALL_LIMIT", 16):
+            file_token = self.client.upload_media(file_path)
+        self.assertEqual(self.stub.files[file_token], content)
+        self.assertEqual(self.stub.calls.count("upload_part"), 10)
+        self.assertNotIn("upload_all", self.stub.calls)
+
+        self.stub.failing.add("upload_part")
+        with mock.patch("feishu_doc.feishu_doc_api.UPLOAD_ALL_LIMIT", 16):
+            self.assertIsNone(self.client.upload_media(file_path))
+
+    @mock.patch("feishu_doc.feishu_doc_api.backoff_delay", return_value=0)
+    def test_download(self, _):
+        content = os.urandom(100000)
+        server = serve_files({"token_1": content, "token_2": content}, {"token_1": [503], "token_2": [404]})
+        self.addCleanup(server.shutdown)
+        file_path = os.path.join(self.tmp_dir, "download.bin")
+        with mock.patch("feishu_doc.feishu_doc_api.BASE_URL", f"http://127.0.0.1:{server.server_port}"):
+            # 5xx 重试后分块写入
+            self.client.download("token_1", file_path, chunk_size=4096)
+            with open(file_path, "rb") as f:
+                self.assertEqual(f.read(), content)
+
+            # 4xx 不重试，不留下临时文件
+            with self.assertRaises(requests.HTTPError):
+                self.client.download("token_2", os.path.join(self.tmp_dir, "missing.bin"))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["download.bin"])
+
+
+if __name__ == '__main__':
+    unittest.main()
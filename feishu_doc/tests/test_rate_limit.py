@@ -0,0 +1,80 @@
+import time
+import types
+import unittest
+from unittest import mock
+
+from feishu_doc import FeishuDocClient, FeishuToken
+from feishu_doc.rate_limit import TokenBucket, backoff_delay, should_retry
+
+
+def response(code=0, status_code=200):
+    return types.SimpleNamespace(code=code, msg="", raw=types.SimpleNamespace(status_code=status_code))
+
+
+class TestRateLimit(unittest.TestCase):
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(20, capacity=2)
+        started = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        # 突发 2 个，其余 4 个按 20 QPS 排队
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+    def test_backoff_delay(self):
+        for attempt in range(10):
+            self.assertTrue(0 <= backoff_delay(attempt, base=0.5, cap=4) <= min(4, 0.5 * 2 ** attempt))
+
+    def test_should_retry(self):
+        self.assertTrue(should_retry(response(1254290)))
+        self.assertTrue(should_retry(response(99991400)))
+        self.assertTrue(should_retry(response(0, 503)))
+        self.assertFalse(should_retry(response(0)))
+        self.assertFalse(should_retry(response(1254043, 400)))
+        self.assertFalse(should_retry(types.SimpleNamespace(code=1)))
+
+
+@mock.patch("feishu_doc.feishu_doc_api.backoff_delay", return_value=0)
+class TestExecute(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FeishuDocClient(FeishuToken("app_token", "pt-test"), qps=1000, max_retries=3)
+
+    def call(self, *results):
+        """依次返回 results 中的 response，异常则抛出"""
+        calls = []
+
+        def call(request):
+            result = results[len(calls)]
+            calls.append(request)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return call, calls
+
+    def test_retry_until_success(self, _):
+        call, calls = self.call(response(1254290), OSError("reset"), response(0, 502), response(0))
+        self.assertEqual(self.client._execute(call, lambda: object()).code, 0)
+        self.assertEqual(len(calls), 4)
+        # 每次重试都重新构造请求
+        self.assertEqual(len(set(map(id, calls))), 4)
+
+    def test_no_retry(self, _):
+        call, calls = self.call(response(1254043, 400))
+        self.assertEqual(self.client._execute(call, "request").code, 1254043)
+        self.assertEqual(calls, ["request"])
+
+    def test_retries_exhausted(self, _):
+        call, calls = self.call(*[response(1254290)] * 4)
+        self.assertEqual(self.client._execute(call, "request").code, 1254290)
+        self.assertEqual(len(calls), 4)
+
+        call, calls = self.call(*[OSError("reset")] * 4)
+        with self.assertRaises(OSError):
+            self.client._execute(call, "request")
+        self.assertEqual(len(calls), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
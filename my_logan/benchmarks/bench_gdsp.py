@@ -0,0 +1,85 @@
+"""
+Benchmark GDSP type lookup and MkTime parsing against the previous implementation.
+
+    python benchmarks/bench_gdsp.py --lines 200000
+"""
+import argparse
+import datetime
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from my_logan.gdsp import gdsp_type_map, gdsp_type_name, parse_mk_time, parse_timestamp  # noqa: E402
+from my_logan.rules import DEFAULT_RULES  # noqa: E402
+
+MK_TIME_FIELD_PATTERN = re.compile(r'(\w+)=(\d+)')
+GDSP_HEADER_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}).*?type:(\d+) MkTime\{(.*?)\}')
+
+
+def legacy_type_name(type):
+    hex_number = hex(int(type))
+    formatted_hex = hex_number[:2] + hex_number[2:].zfill(2).upper()
+    return gdsp_type_map.get(formatted_hex, type) + f"({type})"
+
+
+def legacy_parse(timestamp_str, type_str, mk_time_str):
+    type_value = legacy_type_name(type_str)
+    timestamp = datetime.datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
+    mk_time_values = {k: int(v) for k, v in MK_TIME_FIELD_PATTERN.findall(mk_time_str)}
+    mk_time = datetime.datetime(mk_time_values['year'], mk_time_values['month'], mk_time_values['day'],
+                                mk_time_values['hour'], mk_time_values['minute'], mk_time_values['second'])
+    return type_value, timestamp, mk_time
+
+
+def fast_parse(timestamp_str, type_str, mk_time_str):
+    return gdsp_type_name(type_str), parse_timestamp(timestamp_str), parse_mk_time(mk_time_str)
+
+
+def make_lines(count: int, seed: int = 0) -> list:
+    """一次同步内的记录 MkTime 相同，按 50 条一组生成"""
+    rnd = random.Random(seed)
+    start = datetime.datetime(2025, 2, 21)
+    lines = []
+    for i in range(count):
+        ts = start + datetime.timedelta(milliseconds=i * 37)
+        day = start - datetime.timedelta(days=(i // 50) % 40)
+        mk_time = (f'year={day.year}, month={day.month}, day={day.day}, hour={(i // 50) % 24}, '
+                   f'minute=0, second=0, tz=28')
+        lines.append(f'{ts:%Y-%m-%d %H:%M:%S}.{ts.microsecond // 1000:03d} I GDSP: '
+                     f'type:{rnd.choice((1, 2, 8, 19, 37, 44, 80, 200))} MkTime{{{mk_time}}}')
+    return lines
+
+
+def _bench(name: str, func, args: list):
+    start = time.perf_counter()
+    for arg in args:
+        func(*arg)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<12} {elapsed:8.3f}s  {len(args) / elapsed:>12,.0f} lines/s')
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=200000, help='Number of gdsp_header lines')
+    args = parser.parse_args(argv)
+
+    lines = make_lines(args.lines)
+    groups = [GDSP_HEADER_PATTERN.search(line).groups() for line in lines]
+    assert all(legacy_parse(*group) == fast_parse(*group) for group in groups[:1000])
+
+    legacy = _bench('legacy', legacy_parse, groups)
+    fast = _bench('fast', fast_parse, groups)
+    print(f'speedup      {legacy / fast:8.2f}x')
+
+    # 完整规则匹配，包含正则和格式化
+    gdsp_header = next(rule for rule in DEFAULT_RULES if rule.name == 'gdsp_header')
+    _bench('rule', gdsp_header.apply, [(line,) for line in lines])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark MyLogan.parse_log / output_log on synthetic Logan files.
+
+    python benchmarks/bench_my_logan.py --sizes 10 50 200 --workers 1 4
+
+Every scenario runs in a fresh process so peak RSS is reported per scenario.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from my_logan import MyLogan  # noqa: E402
+from my_logan.synthetic import generate_logan_file  # noqa: E402
+
+KEY = b'0123456789abcdef'
+IV = b'fedcba9876543210'
+# 每个数据块约 200 行，加密后约 4 KB
+LINES_PER_BLOCK = 200
+BLOCK_BYTES = 4 * 1024
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_scenario(file_path: str, out_dir: str, workers: int, queue):
+    logan = MyLogan(file_path, KEY, IV)
+    timings = {}
+
+    start = time.perf_counter()
+    with logan._map_file() as content:
+        blocks = sum(1 for _ in logan._scan_blocks(content))
+    timings['scan'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = sum(len(block) for block in logan.iter_blocks(workers))
+    timings['decode'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = logan.output_log(out_dir, 'bench_result', workers=workers)
+    timings['output_log'] = time.perf_counter() - start
+
+    queue.put({
+        'blocks': blocks,
+        'decoded_bytes': decoded,
+        'status': result.get('status'),
+        'stats': result.get('stats'),
+        'timings': timings,
+        'peak_rss_mb': _peak_rss_mb()
+    })
+
+
+def run_scenario(file_path: str, out_dir: str, workers: int) -> dict:
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_scenario, args=(file_path, out_dir, workers, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='my_logan benchmark')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[10, 50], help='文件大小 (MB)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1], help='解码进程数')
+    parser.add_argument('--malformed', type=float, default=0.01, help='损坏数据块比例')
+    parser.add_argument('--json', dest='json_path', default=None, help='结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            file_path = os.path.join(tmp_dir, f'bench_{size}MB.logan')
+            info = generate_logan_file(file_path, KEY, IV, blocks=max(int(size * 1024 * 1024 / BLOCK_BYTES), 1),
+                                       lines_per_block=LINES_PER_BLOCK, malformed_ratio=args.malformed, seed=1)
+            mb = info['file_size'] / 1024 / 1024
+
+            for workers in args.workers:
+                result = run_scenario(file_path, tmp_dir, workers)
+                elapsed = result['timings']['output_log']
+                row = {
+                    'size_mb': round(mb, 2),
+                    'workers': workers,
+                    'lines': info['lines'],
+                    'mb_per_s': round(mb / elapsed, 2),
+                    'lines_per_s': round(info['lines'] / elapsed),
+                    'peak_rss_mb': round(result['peak_rss_mb'], 1),
+                    'timings': {name: round(value, 3) for name, value in result['timings'].items()},
+                    # output_log 内部各阶段耗时和计数
+                    'stages': result['stats']['timings'],
+                    'counters': result['stats']['counters']
+                }
+                results.append(row)
+                print(f"{row['size_mb']:>8.1f} MB  workers={workers:<3} {row['mb_per_s']:>8.2f} MB/s "
+                      f"{row['lines_per_s']:>10} lines/s  peak {row['peak_rss_mb']:>8.1f} MB")
+                print(f"    timings {row['timings']}")
+                print(f"    stages  {row['stages']}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
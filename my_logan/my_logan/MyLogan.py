@@ -1,103 +1,119 @@
+import base64
+import collections
+import contextlib
 import datetime
+import hashlib
+import itertools
 import json
+import mmap
 import os
 import re
+import time
 import zlib
+from concurrent.futures import ProcessPoolExecutor
 
 import HMLogan
 from Crypto.Cipher import AES
 
-gdsp_type_map = {
-    "0x01": "Wristlet",
-    "0x02": "Heart rate",
-    "0x03": "ECG",
-    "0x04": "Temperature",
-    "0x05": "Sport summary",
-    "0x06": "Sport detail",
-    "0x07": "log",
-    "0x08": "RR interval",
-    "0x09": "Statistics info",
-    "0x0A": "AF",
-    "0x0B": "AF PPG",
-    "0x0C": "ALG info",
-    "0x0D": "PAI",
-    "0x0E": "Coaching",
-    "0x0F": "HR summary",
-    "0x10": "PPG",
-    "0x11": "AF result",
-    "0x12": "Stress",
-    "0x13": "Allday stress",
-    "0x1C": "data summary",
-    "0x1E": "AF ACC",
-    "0x20": "health summary",
-    "0x21": "GPS detail",
-    "0x22": "heart rate detail",
-    "0x23": "Firstbeat data",
-    "0x24": "Firstbeat config",
-    "0x25": "SPO2",
-    "0x26": "OSA process SPO2",
-    "0x27": "OSA event information",
-    "0x28": "ODI数据",
-    "0x29": "站立数据",
-    "0x2A": "ECGsummary",
-    "0x2B": "York OSA事件信息",
-    "0x2C": "打点数据",
-    "0x2D": "固件ECG丢包标记信息",
-    "0x2E": "全天腕温数据",
-    "0x2F": "腕温单次测量数据",
-    "0x30": "腕温80S数据",
-    "0x31": "耳机听力健康相关数据",
-    "0x32": "高低心率扩展协议数据",
-    "0x33": "设备端设置数据",
-    "0x34": "血压校准原始数据",
-    "0x35": "血压校准特征数据",
-    "0x36": "手动测量原始数据",
-    "0x37": "手动测量结果",
-    "0x38": "睡眠呼吸率数据",
-    "0x39": "睡眠呼吸率事件",
-    "0x3A": "静息心率",
-    "0x3B": "运动效果",
-    "0x3C": "行为标注离线数据采集",
-    "0x3D": "运动最大心率数据",
-    "0x3E": "睡眠连续血压测量结果",
-    "0x3F": "今日活动同步",
-    "0x40": "高低心率提醒",
-    "0x41": "低血氧提醒",
-    "0x42": "睡眠计划同步",
-    "0x43": "身体电量",
-    "0x44": "跌倒检测ACC数据",
-    "0x45": "跌倒检测执行情况",
-    "0x46": "运动后恢复心率",
-    "0x47": "身体成分",
-    "0x48": "睡眠结果",
-    "0x49": "HRV",
-    "0x4A": "OSA result",
-    "0x4B": "Health center",
-    "0x4C": "Jet lag",
-    "0x50": "chip log",
-    "0x51": "Duet statistic",
-    "0x52": "Body composition accessories",
-    "0x53": "Ambient light",
-    "0x54": "EDA raw data"
-}
-
-
-def get_gdsp_type_form_map(type):
-    hex_number = hex(int(type))
-    # 格式化为 0x01 形式
-    formatted_hex = hex_number[:2] + hex_number[2:].zfill(2).upper()
-    return gdsp_type_map.get(formatted_hex, type) + f"({type})"
-
-
-def exception_type(type):
-    return type in ['44'] or type in ['打点数据']
+from . import json_backend
+from .block_index import BlockIndex
+# 这些名字原先定义在本模块，移到 gdsp 后在这里重新导出，兼容 from my_logan.MyLogan import ... 的旧用法
+from .gdsp import gdsp_type_map, get_gdsp_type_form_map, exception_type  # noqa: F401
+from .log_store import SqliteLogStore
+from .rules import DEFAULT_RULES, SECTION_SYNC, classify
+from .stats import LogStats
+from .writer import COMPRESSION_SUFFIXES, OutputWriter, SpillFile
+
+LOG_ENTRY_PATTERN = re.compile(rb'\{.*?"c":.*?\}\n')
+
+# output_log 断点文件格式版本
+CHECKPOINT_VERSION = 2
+# 解码输出格式版本，输出内容变化时递增以使缓存失效
+DECODER_VERSION = 1
+
+
+def _clean_block(block: bytes) -> bytes:
+    """Drop invalid utf-8 and wrap blocks without any record into a format error record."""
+    data = block.decode(encoding="utf-8", errors="ignore").encode()
+    if b'{"c' not in data:
+        return (b'{"c":"{\\"fc\\":\\"\\",\\"l\\":\\"\\",\\"t\\":\\"\\",\\"tz\\":\\"\\",\\"m\\":\\"Format Error:'
+                + data + b'\\"}","f":4,"l":0,"n":"","i":0,"m":false}\n')
+    return data
+
+
+def _decode_block(text: bytes, key: bytes, iv: bytes, stats: LogStats = None) -> bytes:
+    """Decrypt and decompress a single Logan block."""
+    try:
+        # 解密数据
+        started = time.perf_counter()
+        cryptor = AES.new(key, AES.MODE_CBC, iv)
+        plain_text = cryptor.decrypt(text)
+        decrypted = time.perf_counter()
+
+        # 解压数据
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        uncompress_data = decompressor.decompress(plain_text)
+        if stats is not None:
+            stats.add_time('decrypt', decrypted - started)
+            stats.add_time('decompress', time.perf_counter() - decrypted)
+        return uncompress_data
+
+    except Exception as e:
+        return _error_block(str(e), stats)
+
+
+# 数据不是 gzip 开头时 zlib 给出的错误，扫描时提前判断出的损坏数据块使用同样的信息
+BAD_HEADER_MESSAGE = 'Error -3 while decompressing data: incorrect header check'
+
+
+def _error_block(message: str, stats: LogStats = None) -> bytes:
+    """Error record emitted in place of a block that cannot be decoded."""
+    if stats is not None:
+        stats.count('corrupt_blocks')
+    return (b'{"c":"{\\"fc\\":\\"\\",\\"l\\":\\"\\",\\"t\\":\\"\\",\\"tz\\":\\"\\",\\"m\\":\\"Error: '
+            + message.encode() + b'\\"}","f":4,"l":0,"n":"","i":0,"m":false}\n')
+
+
+# 进程池 worker 的状态，每个 worker 进程各自 mmap 同一个文件
+_worker_state = {}
+
+
+def _init_block_worker(file_path: str, key: bytes, iv: bytes):
+    f = open(file_path, 'rb')
+    _worker_state.update(
+        file=f,
+        content=mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ),
+        key=key,
+        iv=iv
+    )
+
+
+def _decode_block_range(offsets: list, corrupt: set = frozenset()) -> tuple:
+    content = _worker_state['content']
+    key, iv = _worker_state['key'], _worker_state['iv']
+    stats = LogStats()
+    blocks = []
+    for start, end in offsets:
+        if start in corrupt:
+            blocks.append(_error_block(BAD_HEADER_MESSAGE, stats))
+            continue
+        started = time.perf_counter()
+        text = content[start:end]
+        stats.add_time('read', time.perf_counter() - started)
+        blocks.append(_decode_block(text, key, iv, stats))
+    return blocks, stats
 
 
 class MyLogan(HMLogan.HuamiLogan):
+    # output_log 对每行日志执行的分类规则，可在子类或实例上替换
+    rules = DEFAULT_RULES
+
     def __init__(self, file_path: str = None, key: bytes = None, iv: bytes = None):
         super().__init__(file_path, key, iv)
 
-    def output_log(self, fp: str = None, fn: str = None, errors: str = None) -> dict:
+    def output_log(self, fp: str = None, fn: str = None, errors: str = None, workers: int = None,
+                   resume: bool = False, cache=None, on_stats=None, db_path: str = None, since=None, until=None,
+                   grep=None, compression: str = None) -> dict:
         """
         Output formatted log file with additional processing.
         
@@ -105,6 +121,15 @@ class MyLogan(HMLogan.HuamiLogan):
             fp: File path for output
             fn: File name for output
             errors: Error handling mode
+            workers: Number of processes used to decode blocks, serial when None
+            resume: Keep a checkpoint next to the output and only decode newly appended blocks
+            cache: ResultCache reused across runs, ignored when resuming
+            on_stats: Callback receiving the stats dict once the run finishes
+            db_path: Also write the entries into an indexed SQLite database at this path
+            since: Only output records at or after this time, datetime or epoch milliseconds
+            until: Only output records at or before this time, datetime or epoch milliseconds
+            grep: Keyword or list of keywords, only records containing one of them are output
+            compression: Compress the output file, None, 'gzip' or 'zstd'
         
         Returns:
             Dictionary containing parsing results and metadata
@@ -112,115 +137,168 @@ class MyLogan(HMLogan.HuamiLogan):
         start_time = datetime.datetime.now()
         original_size = os.path.getsize(self.file_path)
 
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f'Unsupported compression: {compression}')
+        if compression and resume:
+            raise ValueError('resume cannot be combined with compression')
+
         # 1. 使用更好的默认值处理
         fp = fp or os.getcwd()
-        fn = fn or f'{self.file_path}_result'
+        fn = fn or f'{self.file_path}_result{COMPRESSION_SUFFIXES[compression]}'
 
         if not os.path.exists(fp):
             raise ValueError('Output path does not exist')
 
-        # 2. 提取常量
-        ERROR_LOG_PATTERN = r'Stop transfer \d+, code=(?!SUCCESS)\w+'
-        FETCH_ERROR_PATTERN = r'fetchData control point:.*?, desc=(?!成功)\S+'
-        SYNC_LOG_PATTERN = 'GDSP|SyncCenter|HMBaseTask|SyncTimeUseCaseImpl|ServerSyncTimeRepository|DeviceXBuilder'
-        gdsp_header = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}).*?type:(\d+) MkTime\{(.*?)\}'
-        IOS_GDSP_PATTERN = r"BaseJob\.swift \| GDSPDomain.*?(\S+?)\(code: (\d+)\).*?errorCode is: (\d+)\((.*?)\)"
-
-        # 3. 将日志处理逻辑拆分为更小的函数
-        def process_unformatted_data(data: bytes) -> bytes:
-            if b'{"c' not in data:
-                return (b'{"c":"{\\"fc\\":\\"\\",\\"l\\":\\"\\",\\"t\\":\\"\\",\\"tz\\":\\"\\",\\"m\\":\\"Format Error:'
-                        + data + b'\\"}","f":4,"l":0,"n":"","i":0,"m":false}\n')
-            return data
-
-        parse_result = self.parse_log()
-
-        # 4. 使用列表推导式优化性能
-        parse_result['unformat_data'] = [
-            process_unformatted_data(log.decode(encoding="utf-8", errors="ignore").encode())
-            for log in parse_result['unformat_data']
-        ]
-
-        unformat_data = b''.join(parse_result['unformat_data'])
-        if not unformat_data:
+        since, until = self._to_millis(since), self._to_millis(until)
+        keywords = self._grep_keywords(grep)
+        filtered = since is not None or until is not None or bool(keywords)
+        if filtered and resume:
+            raise ValueError('resume cannot be combined with since/until/grep')
+
+        # 2. 输出文件路径
+        output_path = os.path.join(fp, fn)
+
+        # 3. 命中缓存时直接输出，不再解密
+        cache_key = None
+        if cache is not None and not resume and not db_path and not filtered:
+            cache_key = cache.make_key(self.file_path, self.key, self.iv, self._decoder_version(errors))
+            cached = cache.get(cache_key)
+            if cached:
+                return self._output_cached(output_path, *cached, compression=compression)
+
+        # 断点续解：校验通过时只解码上次之后追加的数据块
+        checkpoint_path = f'{output_path}.ckpt'
+        checkpoint = self._load_checkpoint(checkpoint_path, output_path) if resume else None
+        if checkpoint:
+            for name, value in checkpoint['app_info'].items():
+                setattr(self, name, value)
+
+        # 按时间过滤时，借助上次解码生成的块索引跳过时间窗口外的整个数据块
+        block_index = BlockIndex.load(self.file_path) if since is not None or until is not None else None
+        offsets, restarts = block_index.select(since, until) if block_index else (None, set())
+        # 完整解码时顺便记录每个数据块的时间范围，供下次过滤使用
+        index_entries = [] if not checkpoint and not keywords and not block_index else None
+
+        # 4. 流式读取数据块，内存占用以单个数据块为上限
+        stats = LogStats()
+        offset = checkpoint['offset'] if checkpoint else 0
+        # 分帧扫描时跳过的损坏字节区间
+        skipped = []
+        blocks = ((start, end, _clean_block(block))
+                  for start, end, block in self._iter_indexed_blocks(workers, offset, stats, offsets, skipped))
+        first_block = next(blocks, None)
+        if first_block is None and not checkpoint and not block_index:
             return {'status': False, 'message': '非Logan日志'}
+        if block_index:
+            stats.count('skipped_blocks', len(block_index) - len(offsets))
+
+        parse_result = {
+            'status': True,
+            'message': '日志解析成功'
+        }
+        # 记录最后一个完整解码的数据块及其末尾不完整的行
+        position = {
+            'tail': base64.b64decode(checkpoint['tail']) if checkpoint else b'',
+            'block': checkpoint['tail_block'] if checkpoint else None
+        }
 
         # 5. 使用生成器优化内存使用
         def parse_log_entries():
-            for entry in re.compile(b'\{.*?"c":.*?\}\n').finditer(unformat_data):
-                try:
-                    log_entry = entry.group().decode(encoding="utf-8", errors="ignore")
-                    log_json = json.loads(log_entry) if errors != 'ignore' else self._safe_json_load(log_entry)
-                    yield self.format_log(log_json)[0]
-                except Exception as e:
-                    if errors == 'ignore':
-                        continue
-                    raise
+            for start, end, block in itertools.chain((first_block,) if first_block else (), blocks):
+                # 数据块末尾不完整的行留到下一个数据块拼接，中间有跳过的数据块时丢弃
+                if start in restarts:
+                    position['tail'] = b''
+                data = position['tail'] + block if position['tail'] else block
+                cut = data.rfind(b'\n') + 1
+                position['tail'] = data[cut:]
+                min_ts = max_ts = first_ts = None
+                line_count = 0
+                for entry in LOG_ENTRY_PATTERN.finditer(data, 0, cut):
+                    line_count += 1
+                    try:
+                        # 数据块已做过 utf-8 清洗，直接从 bytes 解析
+                        started = time.perf_counter()
+                        log_entry = entry.group()
+                        # 关键字在 JSON 解析前直接匹配原始数据
+                        if keywords and not any(keyword in log_entry for keyword in keywords):
+                            stats.count('filtered_entries')
+                            continue
+                        log_json = json_backend.loads(log_entry) if errors != 'ignore' \
+                            else self._safe_json_load(log_entry)
+
+                        timestamp = log_json.get('l')
+                        if isinstance(timestamp, int) and timestamp > 0:
+                            first_ts = timestamp if first_ts is None else first_ts
+                            min_ts = timestamp if min_ts is None else min(min_ts, timestamp)
+                            max_ts = timestamp if max_ts is None else max(max_ts, timestamp)
+                        if filtered and not self._in_range(timestamp, since, until):
+                            stats.count('filtered_entries')
+                            continue
+                        parsed = time.perf_counter()
+                        formatted = self.format_log(log_json)[0]
+                        stats.add_time('json', parsed - started)
+                        stats.add_time('format', time.perf_counter() - parsed)
+                        yield formatted, log_json
+                    except Exception as e:
+                        if errors == 'ignore':
+                            stats.count('skipped_entries')
+                            continue
+                        raise
+                position['block'] = [start, end]
+                if index_entries is not None:
+                    first_line = index_entries[-1][4] + index_entries[-1][5] if index_entries else 0
+                    index_entries.append([start, end, min_ts, max_ts, first_line, line_count, first_ts])
 
         # 6. 使用上下文管理器和更清晰的文件写入逻辑
-        output_path = os.path.join(fp, fn)
-        with open(output_path, 'w') as f:
-            # 写入grep使用说明
-            self._write_header(f, output_path)
-
-            add_info = []
-            errors_info = []
-            format_errors = set()
+        store = SqliteLogStore(db_path, append=bool(checkpoint)) if db_path else None
+        # 过滤区的日志先写到临时文件，断点续解时保存在断点文件旁边
+        add_info = SpillFile(f'{checkpoint_path}.sync' if resume else None,
+                             checkpoint['sync_size'] if checkpoint else 0)
+        errors_info = SpillFile(f'{checkpoint_path}.error' if resume else None,
+                                checkpoint['error_size'] if checkpoint else 0)
+        # 截掉上次写入的过滤区和统计信息，接着主体日志继续写
+        with OutputWriter.open(output_path, compression, checkpoint['body_end'] if checkpoint else None) as f, \
+                add_info, errors_info:
+            if checkpoint:
+                format_errors = {frozenset(item.items()) for item in checkpoint['format_errors']}
+            else:
+                # 写入grep使用说明
+                self._write_header(f, output_path)
+                header_end = f.tell()
+
+                format_errors = set()
 
             # 写入主体日志内容
-            for log_entry in parse_log_entries():
+            lines = 0
+            for log_entry, log_json in parse_log_entries():
+                started = time.perf_counter()
                 f.write(f"{log_entry}\n")
-
-                if re.search(SYNC_LOG_PATTERN, log_entry):
-                    add_info.append(log_entry)
-                if re.search(ERROR_LOG_PATTERN, log_entry):
-                    pattern = r"Stop transfer (\d+), code=(\w+)"
-                    match = re.search(pattern, log_entry)
-                    format_errors.add(
-                        frozenset(
-                            {"type": get_gdsp_type_form_map(match.group(1)), "code": match.group(2),
-                             "error_type": "GDSP_Header"}.items()))
-                    errors_info.append(log_entry)
-                if re.search(FETCH_ERROR_PATTERN, log_entry):
-                    pattern = r'fetchData control point:.*?, desc=(\S+)'
-                    match = re.search(pattern, log_entry)
-                    format_errors.add(
-                        frozenset({"code": match.group(1), "error_type": "GDSP_Data"}.items()))
-                    errors_info.append(log_entry)
-                if match := re.search(IOS_GDSP_PATTERN, log_entry):
-                    sync_name = match.group(1)  # 提取同步名称
-                    sync_code = match.group(2)  # 提取 code 数值
-                    error_code = match.group(3)  # 提取 errorCode 数值
-                    error_message = match.group(4)  # 提取错误信息
-                    format_errors.add(
-                        frozenset({"type": sync_name, "error_type": "GDSP_Data", "code": error_message}.items()))
-                    errors_info.append(log_entry)
-                if match := re.search(gdsp_header, log_entry):
-                    timestamp_str = match.group(1)  # '2025-02-21 08:07:00.303'
-                    type_value = get_gdsp_type_form_map(match.group(2))  # '19'
-                    mk_time_str = match.group(3)  # 'year=2025, month=2, day=20, hour=0, minute=0, second=0, tz=28'
-
-                    # 将日志中的时间转换为 datetime 对象
-                    timestamp = datetime.datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
-                    # 从 mk_time_str 中提取出日期和时间信息
-                    mk_time_values = {k: int(v) for k, v in re.findall(r'(\w+)=(\d+)', mk_time_str)}
-                    mk_time = datetime.datetime(mk_time_values['year'], mk_time_values['month'], mk_time_values['day'],
-                                                mk_time_values['hour'], mk_time_values['minute'],
-                                                mk_time_values['second'])
-
-                    if mk_time >= timestamp + datetime.timedelta(hours=1) and not exception_type(type_value):
-                        errors_info.append(
-                            f"type:{type_value} 未来时间戳，无法同步 timestamp={timestamp} mk_time={mk_time}")
-                        format_errors.add(frozenset(
-                            {"type": type_value, "error_type": "MkTime_1h_new"}.items()))
-                    elif mk_time <= timestamp - datetime.timedelta(weeks=4):
-                        errors_info.append(
-                            f"type:{type_value} 同步了过去一个月的数据，需要关注 timestamp={timestamp} mk_time={mk_time}")
-                        format_errors.add(frozenset(
-                            {"type": type_value, "error_type": "MkTime_1m_old"}.items()))
-
-                else:
-                    pass
+                written = time.perf_counter()
+
+                # 预编译规则单次匹配完成分类和提取
+                hits = classify(log_entry, self.rules)
+                for hit in hits:
+                    stats.rule_hits[hit.rule.name] += 1
+                    if hit.section == SECTION_SYNC:
+                        add_info.append(hit.text)
+                    else:
+                        errors_info.append(hit.text)
+                    if hit.error:
+                        format_errors.add(frozenset(hit.error.items()))
+
+                stats.add_time('write', written - started)
+                stats.add_time('classify', time.perf_counter() - written)
+                lines += 1
+
+                if store is not None:
+                    started = time.perf_counter()
+                    store.add(log_json, hits)
+                    stats.add_time('store', time.perf_counter() - started)
+
+            stats.count('lines', lines)
+            started = time.perf_counter()
+            body_end = f.tell()
+            sync_size, error_size = add_info.tell(), errors_info.tell()
 
             # 写入过滤的日志
             self._write_filtered_logs(f, add_info, errors_info)
@@ -228,81 +306,191 @@ class MyLogan(HMLogan.HuamiLogan):
             # 在文件末尾写入统计信息
             processing_time = (datetime.datetime.now() - start_time).total_seconds()
             self._write_statistics(f, original_size, processing_time)
+            stats.add_time('write', time.perf_counter() - started)
+
+        if store is not None:
+            started = time.perf_counter()
+            store.close()
+            stats.add_time('store', time.perf_counter() - started)
+
+        if index_entries:
+            BlockIndex(self.file_path, index_entries).save()
+
+        if resume and position['block']:
+            self._save_checkpoint(checkpoint_path, {
+                'source': os.path.abspath(self.file_path),
+                'file_size': original_size,
+                'offset': position['block'][1],
+                'tail_block': position['block'],
+                'tail_hash': self._hash_block(*position['block']),
+                'tail': base64.b64encode(position['tail']).decode(),
+                'body_end': body_end,
+                'sync_size': sync_size,
+                'error_size': error_size,
+                'format_errors': [dict(item) for item in format_errors],
+                'app_info': self._app_info()
+            })
 
         # 7. 使用字典字面量简化代码
         parse_result.update({
-            'app_info': {
-                'device_name': self.device_name,
-                'user_id': self.user_id,
-                'system_version': self.system_version,
-                'app_name': self.app_name,
-                'platform': self.platform,
-                'version_name': self.version_name,
-                'version_code': self.version_code,
-                'time_zone': self.time_zone
-            },
+            'app_info': self._app_info(),
+            'log_file': os.path.abspath(self.file_path),
             'out_file': output_path,
-            'format_errors': json.dumps([dict(item) for item in format_errors], ensure_ascii=False)
+            'format_errors': json.dumps([dict(item) for item in format_errors], ensure_ascii=False),
+            'corruption': self._corruption_report(skipped, stats),
+            'stats': stats.to_dict()
         })
+        if db_path:
+            parse_result['db_file'] = db_path
+        if on_stats is not None:
+            on_stats(parse_result['stats'])
+
+        if cache_key:
+            cache.put(cache_key, parse_result, output_path, header_end, compression=compression)
         return parse_result
 
-    def parse_log(self):
-        """Parse encrypted log file and return decrypted content."""
-        result = {
-            'status': None,
-            'unformat_data': [],
-            'message': None
+    def _decoder_version(self, errors: str = None) -> str:
+        """Identify everything besides the file and key/iv that changes the output."""
+        return f"{DECODER_VERSION}:{errors}:{','.join(rule.name for rule in self.rules)}"
+
+    def _output_cached(self, output_path: str, result: dict, body_path: str, compression: str = None) -> dict:
+        """Write a cached result to output_path without decoding the log file."""
+        with OutputWriter.open(output_path, compression) as f, open(body_path, 'rb') as body:
+            self._write_header(f, output_path)
+            f.write_file(body)
+
+        for name, value in result['app_info'].items():
+            setattr(self, name, value)
+        result['log_file'] = os.path.abspath(self.file_path)
+        result['out_file'] = output_path
+        return result
+
+    @staticmethod
+    def _to_millis(value):
+        """Convert a datetime (naive means local time) or epoch milliseconds to epoch milliseconds."""
+        if value is None:
+            return None
+        if isinstance(value, datetime.datetime):
+            return int(value.timestamp() * 1000)
+        return int(value)
+
+    @staticmethod
+    def _in_range(timestamp, since: int = None, until: int = None) -> bool:
+        if since is None and until is None:
+            return True
+        if not isinstance(timestamp, (int, float)):
+            return False
+        return (since is None or timestamp >= since) and (until is None or timestamp <= until)
+
+    @staticmethod
+    def _grep_keywords(grep) -> tuple:
+        """Byte patterns of the keywords as they appear in raw records, also in their JSON escaped form."""
+        if not grep:
+            return ()
+        keywords = set()
+        for keyword in ([grep] if isinstance(grep, str) else grep):
+            keywords.add(keyword.encode())
+            # 消息位于 "c" 字段的 JSON 字符串中，引号等字符会被转义两次
+            escaped = json.dumps(json.dumps(keyword, ensure_ascii=False)[1:-1], ensure_ascii=False)[1:-1]
+            keywords.add(escaped.encode())
+        return tuple(keywords)
+
+    def _app_info(self) -> dict:
+        return {
+            'device_name': self.device_name,
+            'user_id': self.user_id,
+            'system_version': self.system_version,
+            'app_name': self.app_name,
+            'platform': self.platform,
+            'version_name': self.version_name,
+            'version_code': self.version_code,
+            'time_zone': self.time_zone
         }
 
+    def _hash_block(self, start: int, end: int) -> str:
+        """Hash the encrypted bytes of a block, used to detect rewritten files."""
+        with self._map_file() as content:
+            return hashlib.sha1(content[start:end]).hexdigest()
+
+    def _load_checkpoint(self, checkpoint_path: str, output_path: str):
+        """
+        Load the checkpoint of a previous output_log run.
+
+        Returns:
+            Checkpoint dict, or None when missing or no longer matching the log file
+        """
+        if not os.path.exists(checkpoint_path) or not os.path.exists(output_path):
+            return None
+
         try:
-            with open(self.file_path, 'rb') as f:
-                content = f.read()
+            with open(checkpoint_path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
 
-            file_length = len(content)
-            cursor = 0
+        if checkpoint.get('version') != CHECKPOINT_VERSION \
+                or checkpoint['source'] != os.path.abspath(self.file_path) \
+                or os.path.getsize(self.file_path) < checkpoint['file_size'] \
+                or os.path.getsize(output_path) < checkpoint['body_end']:
+            return None
 
-            while cursor < file_length:
-                # 检查标志位和长度
-                if content[cursor:cursor + 1] != b'\x01':
-                    cursor += 1
-                    continue
+        # 过滤区日志保存在断点文件旁边
+        for suffix, size in (('sync', checkpoint['sync_size']), ('error', checkpoint['error_size'])):
+            spill_path = f'{checkpoint_path}.{suffix}'
+            if not os.path.exists(spill_path) or os.path.getsize(spill_path) < size:
+                return None
 
-                cursor += 1
-                if cursor + 4 > file_length:
-                    break
+        # 末尾数据块内容变化说明文件被重写，而不是追加
+        if self._hash_block(*checkpoint['tail_block']) != checkpoint['tail_hash']:
+            return None
 
-                # 读取数据长度
-                length_bytes = content[cursor:cursor + 4]
-                _length = int.from_bytes(length_bytes, byteorder='big')
-                cursor += 4
+        return checkpoint
 
-                if not _length or cursor + _length > file_length:
-                    continue
+    @staticmethod
+    def _save_checkpoint(checkpoint_path: str, checkpoint: dict):
+        checkpoint['version'] = CHECKPOINT_VERSION
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, checkpoint_path)
+
+    def open_view(self, workers: int = None, cache_blocks: int = 16):
+        """
+        Open a random-access view of the formatted log lines, see my_logan.log_view.LogView.
 
-                # 读取数据块
-                data_end = cursor + _length
-                text = content[cursor:data_end]
+        Args:
+            workers: Number of processes used when the block index has to be built
+            cache_blocks: Number of decoded blocks kept in memory
+        """
+        from .log_view import LogView
+        return LogView.open(self, workers=workers, cache_blocks=cache_blocks)
 
-                try:
-                    # 解密数据
-                    cryptor = AES.new(self.key, AES.MODE_CBC, self.iv)
-                    plain_text = cryptor.decrypt(text)
+    @classmethod
+    def process_many(cls, paths_or_dir, out_dir: str, key: bytes, iv: bytes, workers: int = None,
+                     report_path: str = None, **output_kwargs) -> dict:
+        """
+        Decode many Logan files concurrently, see my_logan.batch.process_many.
 
-                    # 解压数据
-                    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
-                    uncompress_data = decompressor.decompress(plain_text)
-                    result['unformat_data'].append(uncompress_data)
+        Returns:
+            Report dict with status, app_info, format_errors and timings per file
+        """
+        from .batch import process_many
+        return process_many(paths_or_dir, out_dir, key, iv, workers=workers, report_path=report_path,
+                            logan_cls=cls, **output_kwargs)
 
-                except Exception as e:
-                    result['unformat_data'].append(
-                        b'{"c":"{\\"fc\\":\\"\\",\\"l\\":\\"\\",\\"t\\":\\"\\",\\"tz\\":\\"\\",\\"m\\":\\"Error: '
-                        + str(e).encode() + b'\\"}","f":4,"l":0,"n":"","i":0,"m":false}\n'
-                    )
+    def parse_log(self, workers: int = None):
+        """Parse encrypted log file and return decrypted content."""
+        result = {
+            'status': None,
+            'unformat_data': [],
+            'message': None
+        }
 
-                cursor = data_end
-                # 检查下一个字节是否为分隔符
-                if cursor < file_length and content[cursor:cursor + 1] == b'\x00':
-                    cursor += 1
+        try:
+            stats = LogStats()
+            skipped = []
+            result['unformat_data'] = list(self.iter_blocks(workers, skipped, stats))
+            result['corruption'] = self._corruption_report(skipped, stats)
 
             if result['unformat_data']:
                 result['status'] = True
@@ -314,12 +502,201 @@ class MyLogan(HMLogan.HuamiLogan):
 
         return result
 
+    def iter_blocks(self, workers: int = None, skipped: list = None, stats: LogStats = None):
+        """
+        Stream decrypted and decompressed blocks one at a time.
+
+        The encrypted file is memory-mapped and walked frame by frame, so only
+        the block currently being decoded is held in memory.
+
+        Args:
+            workers: Number of processes used to decode blocks, serial when None
+            skipped: List receiving the [start, end) byte ranges skipped as corrupt
+            stats: LogStats counting blocks that fail to decode
+
+        Yields:
+            Decompressed block bytes, or an error entry for blocks that fail to decode
+        """
+        for _, _, block in self._iter_indexed_blocks(workers, stats=stats, skipped=skipped):
+            yield block
+
+    def _iter_indexed_blocks(self, workers: int = None, offset: int = 0, stats: LogStats = None,
+                             offsets: list = None, skipped: list = None):
+        """Yield (start, end, block) for every block found from offset on, or for the given block offsets."""
+        if workers and workers > 1:
+            yield from self._iter_blocks_parallel(workers, offset, stats, offsets, skipped)
+            return
+
+        corrupt = set()
+        with self._map_file() as content:
+            for start, end in offsets if offsets is not None else \
+                    self._scan_blocks(content, offset, skipped, self.key, self.iv, corrupt):
+                if stats is not None:
+                    stats.count('blocks')
+                    stats.count('bytes_read', end - start)
+                if start in corrupt:
+                    # 扫描时已确认数据不是 gzip 开头，不再解密解压
+                    yield start, end, _error_block(BAD_HEADER_MESSAGE, stats)
+                    continue
+                started = time.perf_counter()
+                text = content[start:end]
+                if stats is not None:
+                    stats.add_time('read', time.perf_counter() - started)
+                yield start, end, _decode_block(text, self.key, self.iv, stats)
+
+    def _iter_blocks_parallel(self, workers: int, offset: int = 0, stats: LogStats = None, offsets: list = None,
+                              skipped: list = None, batch_size: int = 32):
+        """Decode blocks in a process pool, yielding them in file order."""
+        # 先扫描分帧得到数据块偏移索引，worker 按偏移读取各自 mmap 的文件
+        index = offsets
+        corrupt = set()
+        if index is None:
+            with self._map_file() as content:
+                index = list(self._scan_blocks(content, offset, skipped, self.key, self.iv, corrupt))
+        if not index:
+            return
+
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_block_worker,
+                                   initargs=(self.file_path, self.key, self.iv))
+        try:
+            # 限制在途批次数量，避免消费方较慢时结果堆积在内存中
+            pending = collections.deque()
+            for i in range(0, len(index), batch_size):
+                batch = index[i:i + batch_size]
+                pending.append((batch, pool.submit(_decode_block_range, batch,
+                                                   corrupt.intersection(start for start, _ in batch))))
+                if len(pending) >= workers * 2:
+                    yield from self._collect_batch(*pending.popleft(), stats)
+            while pending:
+                yield from self._collect_batch(*pending.popleft(), stats)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _collect_batch(batch: list, future, stats: LogStats = None):
+        blocks, batch_stats = future.result()
+        if stats is not None:
+            stats.merge(batch_stats)
+            stats.count('blocks', len(batch))
+            stats.count('bytes_read', sum(end - start for start, end in batch))
+        for (start, end), block in zip(batch, blocks):
+            yield start, end, block
+
+    @contextlib.contextmanager
+    def _map_file(self):
+        """Memory-map the encrypted log file for read-only access."""
+        with open(self.file_path, 'rb') as f:
+            # 空文件无法 mmap
+            if not os.fstat(f.fileno()).st_size:
+                yield b''
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                yield content
+
+    @staticmethod
+    def _scan_blocks(content, cursor: int = 0, skipped: list = None, key: bytes = None, iv: bytes = None,
+                     corrupt: set = None):
+        """
+        Walk the Logan framing: \\x01 + 4 byte big-endian length + data [+ \\x00].
+
+        A frame is accepted when its length is a non-zero multiple of the AES
+        block size that fits in the file. When key/iv are given, the first AES
+        block of every frame is decrypted to check for the gzip header:
+        - a frame directly following the previous one that fails the check is
+          still yielded, and added to corrupt, when the next frame or the end
+          of the file follows it, so callers emit an Error record for it
+          without decoding it;
+        - otherwise its header is treated as garbage, and the next \\x01 is
+          located with find and has to pass the check itself, so stray \\x01
+          bytes inside encrypted data are not taken as frames.
+
+        Args:
+            content: Encrypted file content
+            cursor: Offset to start from
+            skipped: List receiving the [start, end) byte ranges skipped as corrupt
+            key: AES key used to validate frames
+            iv: AES iv used to validate frames
+            corrupt: Set receiving the start offset of yielded frames that fail the gzip header check
+
+        Yields:
+            (start, end) offsets of each encrypted block
+        """
+        file_length = len(content)
+        cipher = AES.new(key, AES.MODE_ECB) if key and iv else None
+        # 紧跟上一个数据块的帧头可信，重新同步找到的帧头需要额外校验
+        in_sequence = True
+        gap_start = None
+        # 从上一个数据块的结尾继续扫描（断点续解）时，先跳过它后面的分隔符
+        if 0 < cursor < file_length and content[cursor] == 0x00:
+            cursor += 1
+
+        while cursor < file_length:
+            # 检查标志位，不是帧头时直接查找下一个 \x01
+            if content[cursor] != 0x01:
+                gap_start = cursor if gap_start is None else gap_start
+                in_sequence = False
+                cursor = content.find(b'\x01', cursor + 1)
+                if cursor < 0:
+                    cursor = file_length
+                continue
+
+            # 读取数据长度，必须是 AES 分组长度的整数倍且不超出文件
+            data_start = cursor + 5
+            _length = int.from_bytes(content[cursor + 1:data_start], byteorder='big')
+            data_end = data_start + _length
+            plausible = 0 < _length and _length % AES.block_size == 0 and data_end <= file_length
+            bad_header = False
+            if plausible and cipher is not None:
+                # 只解密第一个分组，检查 gzip 头
+                first = cipher.decrypt(content[data_start:data_start + AES.block_size])
+                bad_header = first[0] ^ iv[0] != 0x1f or first[1] ^ iv[1] != 0x8b
+                if bad_header:
+                    # 紧跟上一个数据块、且后面接着下一个帧头或文件结尾时，认为分帧可信，只是数据损坏（如密钥错误）
+                    next_frame = data_end + 1 if data_end < file_length and content[data_end] == 0x00 else data_end
+                    plausible = in_sequence and (next_frame >= file_length or content[next_frame] == 0x01)
+            if not plausible:
+                gap_start = cursor if gap_start is None else gap_start
+                in_sequence = False
+                cursor += 1
+                continue
+
+            if gap_start is not None:
+                if skipped is not None:
+                    skipped.append([gap_start, cursor])
+                gap_start = None
+
+            # 读取数据块
+            if bad_header and corrupt is not None:
+                corrupt.add(data_start)
+            yield data_start, data_end
+
+            cursor = data_end
+            in_sequence = True
+            # 检查下一个字节是否为分隔符
+            if cursor < file_length and content[cursor] == 0x00:
+                cursor += 1
+
+        if gap_start is not None and skipped is not None:
+            skipped.append([gap_start, file_length])
+
+    @staticmethod
+    def _corruption_report(skipped: list, stats: LogStats) -> dict:
+        """Byte ranges skipped while scanning frames and the number of blocks that failed to decode."""
+        return {
+            'skipped_ranges': skipped,
+            'skipped_bytes': sum(end - start for start, end in skipped),
+            'corrupt_blocks': stats.counters['corrupt_blocks']
+        }
+
     @staticmethod
-    def _safe_json_load(log_entry: str) -> dict:
+    def _safe_json_load(log_entry) -> dict:
         """Safely load JSON with error handling."""
         try:
-            return json.loads(log_entry)
+            return json_backend.loads(log_entry)
         except json.JSONDecodeError:
+            if isinstance(log_entry, bytes):
+                log_entry = log_entry.decode(encoding="utf-8", errors="ignore")
             return {
                 'c': json.dumps({
                     'fc': '', 'l': '', 't': '', 'm': f'JSONDecodeError：{log_entry}',
@@ -368,10 +745,10 @@ class MyLogan(HMLogan.HuamiLogan):
         file.write(f"\n处理用时: {processing_time:.2f} 秒\n")
 
     @staticmethod
-    def _write_filtered_logs(file, add_info: list, errors_info: list):
+    def _write_filtered_logs(file, add_info: SpillFile, errors_info: SpillFile):
         """Write filtered logs to file."""
         file.write("\n\n\n\n*********************************************同步中心日志过滤******************\n\n")
-        file.writelines(f"{log}\n" for log in add_info)
+        add_info.copy_to(file)
 
         file.write("\n\n\n\n*********************************************ERROR INFO******************\n\n")
-        file.writelines(f"{log}\n" for log in errors_info)
+        errors_info.copy_to(file)
@@ -1 +1,4 @@
 from .MyLogan import MyLogan
+from .cache import ResultCache
+from .log_store import SqliteLogStore
+from .error_index import ErrorIndex
@@ -0,0 +1,136 @@
+import argparse
+import collections
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .error_index import ErrorIndex
+from .writer import COMPRESSION_SUFFIXES
+
+
+def _list_logs(paths_or_dir) -> list:
+    if isinstance(paths_or_dir, (str, os.PathLike)):
+        if not os.path.isdir(paths_or_dir):
+            return [os.fspath(paths_or_dir)]
+        return sorted(entry.path for entry in os.scandir(paths_or_dir)
+                      if entry.is_file() and not entry.name.startswith('.'))
+    return [os.fspath(path) for path in paths_or_dir]
+
+
+def _output_names(file_paths: list) -> list:
+    """Output name stem of every file, inputs sharing a basename get a digest of their path appended."""
+    counts = collections.Counter(os.path.basename(path) for path in file_paths)
+    names = []
+    for path in file_paths:
+        name = os.path.basename(path)
+        if counts[name] > 1:
+            # 不同目录下的同名文件，避免输出互相覆盖
+            name = f'{name}_{hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]}'
+        names.append(name)
+    return names
+
+
+def _process_one(logan_cls, file_path: str, out_dir: str, key: bytes, iv: bytes, output_kwargs: dict,
+                 name: str = None) -> dict:
+    """Decode a single file, turning any failure into a failed report item."""
+    start_time = time.perf_counter()
+    item = {'file': file_path}
+    try:
+        suffix = COMPRESSION_SUFFIXES[output_kwargs.get('compression')]
+        name = name or os.path.basename(file_path)
+        result = logan_cls(file_path, key, iv).output_log(out_dir, f'{name}_result{suffix}', **output_kwargs)
+        item.update({
+            'status': bool(result.get('status')),
+            'message': result.get('message'),
+            'out_file': result.get('out_file'),
+            'app_info': result.get('app_info'),
+            'format_errors': json.loads(result['format_errors']) if 'format_errors' in result else []
+        })
+    except Exception as e:
+        item.update({'status': False, 'message': f'{type(e).__name__}: {e}'})
+    item['elapsed'] = round(time.perf_counter() - start_time, 3)
+    return item
+
+
+def process_many(paths_or_dir, out_dir: str, key: bytes, iv: bytes, workers: int = None, report_path: str = None,
+                 logan_cls=None, **output_kwargs) -> dict:
+    """
+    Decode many Logan files concurrently and write one aggregated report.
+
+    Args:
+        paths_or_dir: Directory of Logan files, or an iterable of file paths
+        out_dir: Directory for the _result files, files sharing a basename get a path digest in their name
+        key: AES key
+        iv: AES iv
+        workers: Number of files processed at the same time, os.cpu_count() when None
+        report_path: JSON report path, defaults to report.json in out_dir
+        logan_cls: MyLogan subclass used to decode each file
+        **output_kwargs: Passed through to output_log
+
+    Returns:
+        The report dict
+    """
+    if logan_cls is None:
+        from .MyLogan import MyLogan
+        logan_cls = MyLogan
+
+    start_time = time.perf_counter()
+    file_paths = _list_logs(paths_or_dir)
+    names = _output_names(file_paths)
+    os.makedirs(out_dir, exist_ok=True)
+
+    items = [None] * len(file_paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_process_one, logan_cls, file_path, out_dir, key, iv, output_kwargs, names[i]): i
+                   for i, file_path in enumerate(file_paths)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                items[i] = future.result()
+            except Exception as e:
+                # worker 进程异常退出等情况
+                items[i] = {'file': file_paths[i], 'status': False, 'message': f'{type(e).__name__}: {e}'}
+            print(f"[{done}/{len(file_paths)}] {file_paths[i]} status={items[i]['status']}")
+
+    succeeded = sum(1 for item in items if item['status'])
+    report = {
+        'total': len(items),
+        'succeeded': succeeded,
+        'failed': len(items) - succeeded,
+        'elapsed': round(time.perf_counter() - start_time, 3),
+        'files': items
+    }
+
+    report_path = report_path or os.path.join(out_dir, 'report.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='my_logan', description='批量解析 Logan 日志')
+    parser.add_argument('paths', nargs='+', help='Logan 文件或所在目录')
+    parser.add_argument('-o', '--out-dir', default=os.getcwd(), help='输出目录')
+    parser.add_argument('--key', required=True, help='AES key')
+    parser.add_argument('--iv', required=True, help='AES iv')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='并发处理的文件数')
+    parser.add_argument('--report', default=None, help='汇总报告路径，默认 <out-dir>/report.json')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], default=None, help='压缩输出文件')
+    parser.add_argument('--error-index', default=None, help='把 format_errors 合并到这个 SQLite 错误索引')
+    args = parser.parse_args(argv)
+
+    paths = args.paths[0] if len(args.paths) == 1 else args.paths
+    report = process_many(paths, args.out_dir, args.key.encode(), args.iv.encode(), workers=args.workers,
+                          report_path=args.report, compression=args.compression)
+    print(f"total={report['total']} succeeded={report['succeeded']} failed={report['failed']} "
+          f"elapsed={report['elapsed']}s")
+    if args.error_index:
+        with ErrorIndex(args.error_index) as index:
+            print(f"error index updated={index.ingest_report(report)}")
+    return 0 if not report['failed'] else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
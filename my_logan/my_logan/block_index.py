@@ -0,0 +1,95 @@
+import json
+import os
+
+# 块索引文件格式版本
+BLOCK_INDEX_VERSION = 2
+
+
+class BlockIndex:
+    """
+    Index of the blocks of one Logan file.
+
+    Each entry is [start, end, min_ts, max_ts, first_line, line_count, first_ts]:
+    the offsets of the encrypted block, the smallest/largest record timestamp
+    (ms) found in it, the number of the block's first record in the whole
+    file, its number of records and the timestamp of its first record. The
+    timestamps are None when the block has no timestamped record. A record
+    cut at the end of a block belongs to the block it ends in. The index is
+    saved next to the log file and only reused while the file size and mtime
+    are unchanged.
+
+    Args:
+        file_path: Logan file the index belongs to
+        entries: Index entries in file order
+        index_path: Sidecar path, defaults to <file_path>.blkidx
+    """
+
+    def __init__(self, file_path: str, entries: list = None, index_path: str = None):
+        self.file_path = file_path
+        self.entries = entries if entries is not None else []
+        self.index_path = index_path or f'{file_path}.blkidx'
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def line_count(self) -> int:
+        """Number of records in the whole file."""
+        return self.entries[-1][4] + self.entries[-1][5] if self.entries else 0
+
+    def _signature(self) -> dict:
+        stat = os.stat(self.file_path)
+        return {'file_size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    @classmethod
+    def load(cls, file_path: str, index_path: str = None):
+        """
+        Load the saved index of a Logan file.
+
+        Returns:
+            BlockIndex, or None when missing or out of date
+        """
+        index = cls(file_path, index_path=index_path)
+        try:
+            with open(index.index_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('version') != BLOCK_INDEX_VERSION or data.get('signature') != index._signature():
+            return None
+        index.entries = data['entries']
+        return index
+
+    def save(self):
+        """Save the index next to the log file, silently skipped when the directory is read-only."""
+        data = {'version': BLOCK_INDEX_VERSION, 'signature': self._signature(), 'entries': self.entries}
+        tmp_path = f'{self.index_path}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def select(self, since: int = None, until: int = None):
+        """
+        Pick the blocks that may hold records within [since, until].
+
+        Returns:
+            (offsets, restarts): (start, end) of the selected blocks, and the starts of
+            selected blocks that follow a skipped one
+        """
+        offsets = []
+        restarts = set()
+        skipped = False
+        for start, end, min_ts, max_ts, *_ in self.entries:
+            if min_ts is not None and ((since is not None and max_ts < since)
+                                       or (until is not None and min_ts > until)):
+                skipped = True
+                continue
+            offsets.append((start, end))
+            if skipped:
+                restarts.add(start)
+                skipped = False
+        return offsets, restarts
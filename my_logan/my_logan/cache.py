@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from .writer import copy_body
+
+
+class ResultCache:
+    """
+    On-disk cache of output_log results.
+
+    Entries are keyed by a digest of the log file plus the key/iv and decoder
+    version, and hold the formatted log body together with the result dict.
+    The total size is bounded, least recently used entries are evicted first.
+
+    Args:
+        cache_dir: Directory holding the cache entries
+        max_size: Maximum total size of the cache in bytes
+    """
+
+    RESULT_FILE = 'result.json'
+    BODY_FILE = 'body'
+
+    def __init__(self, cache_dir: str, max_size: int = 10 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def file_digest(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """Digest of the file content."""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def make_key(self, file_path: str, key: bytes, iv: bytes, version: str) -> str:
+        """Cache key of a log file decoded with the given key/iv and decoder version."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(self.file_digest(file_path).encode())
+        digest.update(key or b'')
+        digest.update(iv or b'')
+        digest.update(version.encode())
+        return digest.hexdigest()
+
+    def get(self, cache_key: str):
+        """
+        Look up a cache entry and mark it as recently used.
+
+        Returns:
+            (result dict, body file path), or None on a miss
+        """
+        entry_dir = os.path.join(self.cache_dir, cache_key)
+        result_path = os.path.join(entry_dir, self.RESULT_FILE)
+        body_path = os.path.join(entry_dir, self.BODY_FILE)
+
+        try:
+            with open(result_path, encoding='utf-8') as f:
+                result = json.load(f)
+            if not os.path.exists(body_path):
+                return None
+            os.utime(result_path)
+        except (OSError, ValueError):
+            return None
+
+        return result, body_path
+
+    def put(self, cache_key: str, result: dict, output_path: str, body_offset: int = 0, compression: str = None):
+        """
+        Store the result dict and the output file content from body_offset on.
+
+        A compressed output file is stored decompressed, body_offset is the uncompressed offset.
+        """
+        tmp_dir = tempfile.mkdtemp(prefix=f'.{cache_key}.', dir=self.cache_dir)
+        try:
+            with open(os.path.join(tmp_dir, self.RESULT_FILE), 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False)
+            with open(os.path.join(tmp_dir, self.BODY_FILE), 'wb') as dst:
+                copy_body(output_path, dst, body_offset, compression)
+
+            # 重命名保证其它进程不会读到写了一半的缓存
+            os.rename(tmp_dir, os.path.join(self.cache_dir, cache_key))
+        except OSError:
+            # 其它进程已写入相同的缓存
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_size."""
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if name.startswith('.') or not os.path.isdir(entry_dir):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+                last_used = os.path.getmtime(os.path.join(entry_dir, self.RESULT_FILE))
+            except OSError:
+                continue
+            entries.append((last_used, size, entry_dir))
+            total_size += size
+
+        for last_used, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
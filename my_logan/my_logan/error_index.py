@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# 聚合键，依次为 GDSP 类型、错误类型、错误码、App 版本、平台
+KEY_FIELDS = ('type', 'error_type', 'code', 'app_version', 'platform')
+
+
+class ErrorIndex:
+    """
+    Fleet-wide index of output_log format_errors stored in SQLite.
+
+    Every ingested file contributes each of its distinct errors once, keyed by
+    (type, error_type, code, app_version, platform). Ingesting the same file
+    again replaces its previous contribution, so merges are incremental and
+    idempotent.
+
+    Args:
+        db_path: SQLite database path, created when missing
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY, fingerprint TEXT, app_version TEXT, platform TEXT, ingested_at REAL);
+            CREATE TABLE IF NOT EXISTS file_errors (
+                source TEXT, type TEXT, error_type TEXT, code TEXT, app_version TEXT, platform TEXT);
+            CREATE INDEX IF NOT EXISTS idx_file_errors_source ON file_errors (source);
+            CREATE TABLE IF NOT EXISTS errors (
+                type TEXT, error_type TEXT, code TEXT, app_version TEXT, platform TEXT, files INTEGER,
+                PRIMARY KEY (type, error_type, code, app_version, platform));
+            CREATE INDEX IF NOT EXISTS idx_errors_files ON errors (files);
+        ''')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def ingest(self, source: str, app_info: dict, format_errors: list) -> bool:
+        """
+        Merge the format_errors of one decoded file.
+
+        Args:
+            source: Identity of the file, the absolute Logan file path when ingested from results or reports
+            app_info: app_info of the output_log result
+            format_errors: List of error dicts
+
+        Returns:
+            False when the file was already ingested with the same errors
+        """
+        app_info = app_info or {}
+        app_version = str(app_info.get('version_name') or '')
+        platform = str(app_info.get('platform') or '')
+        keys = sorted({(str(error.get('type') or ''), str(error.get('error_type') or ''),
+                        str(error.get('code') or ''), app_version, platform) for error in format_errors})
+        fingerprint = hashlib.sha1(json.dumps(keys, ensure_ascii=False).encode()).hexdigest()
+
+        with self.conn:
+            row = self.conn.execute('SELECT fingerprint FROM files WHERE source = ?', (source,)).fetchone()
+            if row and row[0] == fingerprint:
+                return False
+            if row:
+                # 重新导入时先撤销上次的计数
+                old_keys = self.conn.execute(f'SELECT {", ".join(KEY_FIELDS)} FROM file_errors WHERE source = ?',
+                                             (source,)).fetchall()
+                self.conn.executemany('UPDATE errors SET files = files - 1 WHERE type = ? AND error_type = ? '
+                                      'AND code = ? AND app_version = ? AND platform = ?', old_keys)
+                self.conn.execute('DELETE FROM errors WHERE files <= 0')
+                self.conn.execute('DELETE FROM file_errors WHERE source = ?', (source,))
+
+            self.conn.executemany('INSERT INTO file_errors VALUES (?, ?, ?, ?, ?, ?)',
+                                  [(source, *key) for key in keys])
+            self.conn.executemany('INSERT INTO errors VALUES (?, ?, ?, ?, ?, 1) ON CONFLICT '
+                                  f'({", ".join(KEY_FIELDS)}) DO UPDATE SET files = files + 1', keys)
+            self.conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)',
+                              (source, fingerprint, app_version, platform, time.time()))
+        return True
+
+    def ingest_result(self, result: dict, source: str = None) -> bool:
+        """Merge one output_log result, identified by source or its input log_file."""
+        if not result.get('status') or 'format_errors' not in result:
+            return False
+        return self.ingest(os.path.abspath(source or result['log_file']), result.get('app_info'),
+                           json.loads(result['format_errors']))
+
+    def ingest_report(self, report) -> int:
+        """
+        Merge a process_many report dict or report.json path.
+
+        Returns:
+            Number of files whose errors changed
+        """
+        if isinstance(report, str):
+            with open(report, encoding='utf-8') as f:
+                report = json.load(f)
+        return sum(self.ingest(os.path.abspath(item['file']), item.get('app_info'), item.get('format_errors') or [])
+                   for item in report['files'] if item.get('status'))
+
+    @staticmethod
+    def _where(filters: dict):
+        for field in filters:
+            if field not in KEY_FIELDS:
+                raise ValueError(f'Unknown field: {field}')
+        if not filters:
+            return '', []
+        return ' WHERE ' + ' AND '.join(f'{field} = ?' for field in filters), [str(v) for v in filters.values()]
+
+    def top(self, n: int = 10, **filters) -> list:
+        """
+        Most frequent errors, optionally filtered by key fields such as platform='android'.
+
+        Returns:
+            List of dicts with the key fields and the number of files
+        """
+        where, params = self._where(filters)
+        rows = self.conn.execute(f'SELECT {", ".join(KEY_FIELDS)}, files FROM errors{where} '
+                                 f'ORDER BY files DESC LIMIT ?', (*params, n)).fetchall()
+        return [dict(zip(KEY_FIELDS + ('files',), row)) for row in rows]
+
+    def group_by(self, fields, n: int = None, **filters) -> list:
+        """
+        Number of distinct files per combination of the given key fields.
+
+        Args:
+            fields: Key field name or list of names, e.g. ['type', 'app_version']
+            n: Only return the n largest groups
+            **filters: Equality filters on key fields
+        """
+        fields = [fields] if isinstance(fields, str) else list(fields)
+        self._where(dict.fromkeys(fields))
+        where, params = self._where(filters)
+        sql = (f'SELECT {", ".join(fields)}, COUNT(DISTINCT source) AS files FROM file_errors{where} '
+               f'GROUP BY {", ".join(fields)} ORDER BY files DESC')
+        if n is not None:
+            sql += ' LIMIT ?'
+            params.append(n)
+        return [dict(zip(fields + ['files'], row)) for row in self.conn.execute(sql, params).fetchall()]
+
+    def rows(self) -> list:
+        """All aggregated errors as bitable rows, 'key' joins the key fields."""
+        return [{'key': '|'.join(row[:len(KEY_FIELDS)]), **dict(zip(KEY_FIELDS + ('files',), row))}
+                for row in self.conn.execute(f'SELECT {", ".join(KEY_FIELDS)}, files FROM errors')]
+
+    def push(self, client, table_id: str):
+        """
+        Sync the aggregated errors to a bitable in one diff-based batch.
+
+        Args:
+            client: feishu_doc FeishuDocClient, or any object with sync_table(table_id, rows, key)
+            table_id: Table with the columns key, type, error_type, code, app_version, platform and files
+        """
+        return client.sync_table(table_id, self.rows(), 'key')
@@ -0,0 +1,127 @@
+import datetime
+import functools
+import re
+
+gdsp_type_map = {
+    "0x01": "Wristlet",
+    "0x02": "Heart rate",
+    "0x03": "ECG",
+    "0x04": "Temperature",
+    "0x05": "Sport summary",
+    "0x06": "Sport detail",
+    "0x07": "log",
+    "0x08": "RR interval",
+    "0x09": "Statistics info",
+    "0x0A": "AF",
+    "0x0B": "AF PPG",
+    "0x0C": "ALG info",
+    "0x0D": "PAI",
+    "0x0E": "Coaching",
+    "0x0F": "HR summary",
+    "0x10": "PPG",
+    "0x11": "AF result",
+    "0x12": "Stress",
+    "0x13": "Allday stress",
+    "0x1C": "data summary",
+    "0x1E": "AF ACC",
+    "0x20": "health summary",
+    "0x21": "GPS detail",
+    "0x22": "heart rate detail",
+    "0x23": "Firstbeat data",
+    "0x24": "Firstbeat config",
+    "0x25": "SPO2",
+    "0x26": "OSA process SPO2",
+    "0x27": "OSA event information",
+    "0x28": "ODI数据",
+    "0x29": "站立数据",
+    "0x2A": "ECGsummary",
+    "0x2B": "York OSA事件信息",
+    "0x2C": "打点数据",
+    "0x2D": "固件ECG丢包标记信息",
+    "0x2E": "全天腕温数据",
+    "0x2F": "腕温单次测量数据",
+    "0x30": "腕温80S数据",
+    "0x31": "耳机听力健康相关数据",
+    "0x32": "高低心率扩展协议数据",
+    "0x33": "设备端设置数据",
+    "0x34": "血压校准原始数据",
+    "0x35": "血压校准特征数据",
+    "0x36": "手动测量原始数据",
+    "0x37": "手动测量结果",
+    "0x38": "睡眠呼吸率数据",
+    "0x39": "睡眠呼吸率事件",
+    "0x3A": "静息心率",
+    "0x3B": "运动效果",
+    "0x3C": "行为标注离线数据采集",
+    "0x3D": "运动最大心率数据",
+    "0x3E": "睡眠连续血压测量结果",
+    "0x3F": "今日活动同步",
+    "0x40": "高低心率提醒",
+    "0x41": "低血氧提醒",
+    "0x42": "睡眠计划同步",
+    "0x43": "身体电量",
+    "0x44": "跌倒检测ACC数据",
+    "0x45": "跌倒检测执行情况",
+    "0x46": "运动后恢复心率",
+    "0x47": "身体成分",
+    "0x48": "睡眠结果",
+    "0x49": "HRV",
+    "0x4A": "OSA result",
+    "0x4B": "Health center",
+    "0x4C": "Jet lag",
+    "0x50": "chip log",
+    "0x51": "Duet statistic",
+    "0x52": "Body composition accessories",
+    "0x53": "Ambient light",
+    "0x54": "EDA raw data"
+}
+
+
+# 按整数类型号查表，导入时从 gdsp_type_map 生成一次
+GDSP_TYPE_NAMES = {int(key, 16): name for key, name in gdsp_type_map.items()}
+
+MK_TIME_FIELDS = ('year', 'month', 'day', 'hour', 'minute', 'second')
+MK_TIME_FIELD_PATTERN = re.compile(r'(\w+)=(\d+)')
+
+
+@functools.lru_cache(maxsize=1024)
+def gdsp_type_name(type):
+    """
+    Display name of a decimal GDSP type string, e.g. '19' -> 'Allday stress(19)'.
+    """
+    return GDSP_TYPE_NAMES.get(int(type), type) + f"({type})"
+
+
+def get_gdsp_type_form_map(type):
+    return gdsp_type_name(type)
+
+
+def parse_timestamp(text):
+    """
+    Parse a fixed format 'YYYY-MM-DD HH:MM:SS.fff' log timestamp.
+    """
+    return datetime.datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]), int(text[11:13]),
+                             int(text[14:16]), int(text[17:19]), int(text[20:23]) * 1000)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_mk_time(text):
+    """
+    Parse a MkTime body such as 'year=2025, month=2, day=20, hour=0, minute=0, second=0, tz=28'.
+
+    The same MkTime repeats for every record of a sync, so results are memoized.
+    """
+    values = {}
+    for field in text.split(','):
+        name, _, value = field.lstrip().partition('=')
+        values[name] = value
+    fields = [values.get(name, '') for name in MK_TIME_FIELDS]
+    if not all(value.isdigit() for value in fields):
+        # 格式不规范时按原来的正则提取
+        values = {k: int(v) for k, v in MK_TIME_FIELD_PATTERN.findall(text)}
+        fields = [values[name] for name in MK_TIME_FIELDS]
+    return datetime.datetime(*map(int, fields))
+
+
+def exception_type(type):
+    return type in ['44'] or type in ['打点数据']
@@ -0,0 +1,42 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    return json.loads(data)
+
+
+def _orjson_loads(data):
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson 比标准库严格（如 NaN、Infinity），失败时交给标准库处理
+        return json.loads(data)
+
+
+BACKENDS = {'json': _json_loads}
+if orjson is not None:
+    BACKENDS['orjson'] = _orjson_loads
+
+_loads = BACKENDS['orjson'] if orjson is not None else BACKENDS['json']
+
+
+def use_backend(name: str):
+    """Switch the JSON backend used by loads, one of BACKENDS."""
+    global _loads
+    if name not in BACKENDS:
+        raise ValueError(f'JSON backend {name} is not available, choose from {list(BACKENDS)}')
+    _loads = BACKENDS[name]
+
+
+def backend_name() -> str:
+    return next(name for name, loads_func in BACKENDS.items() if loads_func is _loads)
+
+
+def loads(data):
+    """Parse JSON directly from bytes (or str) with the active backend."""
+    return _loads(data)
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+
+from . import json_backend
+
+COLUMNS = ('timestamp', 'level', 'thread', 'tag', 'message', 'gdsp_type', 'gdsp_code', 'error_type')
+
+
+class SqliteLogStore:
+    """
+    Structured, indexed output of decoded Logan logs.
+
+    Rows are written in batches into a ``logs`` table with typed columns and
+    b-tree indexes on timestamp, level, tag and gdsp_type; messages are also
+    indexed by an FTS5 table (when the sqlite build supports it) so keyword
+    queries do not scan the whole log.
+
+    Args:
+        path: SQLite database path
+        append: Keep existing rows instead of recreating the database
+        batch_size: Rows buffered before each insert
+    """
+
+    def __init__(self, path: str, append: bool = False, batch_size: int = 5000):
+        if not append and os.path.exists(path):
+            os.remove(path)
+
+        self.path = path
+        self.batch_size = batch_size
+        self._rows = []
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript('''
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY,
+                timestamp INTEGER,
+                level TEXT,
+                thread TEXT,
+                tag TEXT,
+                message TEXT,
+                gdsp_type TEXT,
+                gdsp_code TEXT,
+                error_type TEXT
+            );
+        ''')
+        try:
+            self.connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(message, content='logs', content_rowid='id')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # sqlite 未编译 FTS5
+            self.fts = False
+
+    def add(self, record: dict, hits=()):
+        """
+        Buffer one decoded entry.
+
+        Args:
+            record: Logan record as parsed by output_log
+            hits: RuleHits of the formatted line, the first one carrying an error fills the GDSP columns
+        """
+        try:
+            content = json_backend.loads(record.get('c') or '{}')
+        except ValueError:
+            content = {}
+        if not isinstance(content, dict):
+            content = {}
+        error = next((hit.error for hit in hits if hit.error), None) or {}
+        self._rows.append((record.get('l'), content.get('l'), record.get('n'), content.get('t'), content.get('m'),
+                           error.get('type'), error.get('code'), error.get('error_type')))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self.connection.executemany(
+                f"INSERT INTO logs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", self._rows)
+            self._rows = []
+
+    def close(self):
+        """Flush pending rows, build the indexes and close the database."""
+        self.flush()
+        # 写完后统一建索引，比逐行维护更快
+        self.connection.executescript('''
+            CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_logs_level ON logs (level);
+            CREATE INDEX IF NOT EXISTS idx_logs_tag ON logs (tag);
+            CREATE INDEX IF NOT EXISTS idx_logs_gdsp_type ON logs (gdsp_type);
+        ''')
+        if self.fts:
+            self.connection.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def search(path: str, query: str, limit: int = 100) -> list:
+        """Full-text search messages of a closed store, returns rows as dicts in log order."""
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = connection.execute(
+                "SELECT logs.* FROM logs_fts JOIN logs ON logs.id = logs_fts.rowid "
+                "WHERE logs_fts MATCH ? ORDER BY logs.id LIMIT ?", (query, limit)).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            connection.close()
@@ -0,0 +1,149 @@
+import bisect
+import collections
+
+from .MyLogan import LOG_ENTRY_PATTERN, _clean_block, _decode_block
+from .block_index import BlockIndex
+
+
+def _entry_time(log_json: dict):
+    timestamp = log_json.get('l')
+    return timestamp if isinstance(timestamp, int) and timestamp > 0 else None
+
+
+class LogView:
+    """
+    Random-access view of the formatted lines of a Logan file.
+
+    Only the blocks holding the requested lines are decrypted, located through
+    the block index saved next to the log file. Decoded blocks are kept in a
+    small LRU cache, so paging back and forth stays cheap.
+
+        view = MyLogan(file_path, key, iv).open_view()
+        len(view), view[1000:1050], view.seek_time(datetime.datetime(2025, 2, 21, 8))
+
+    Args:
+        logan: MyLogan instance of the file
+        index: BlockIndex with line numbers
+        cache_blocks: Number of decoded blocks kept in memory
+    """
+
+    def __init__(self, logan, index: BlockIndex, cache_blocks: int = 16):
+        self.logan = logan
+        self.index = index
+        self.cache_blocks = cache_blocks
+        self._first_lines = [entry[4] for entry in index.entries]
+        self._blocks = collections.OrderedDict()
+        self._lines = collections.OrderedDict()
+
+    @classmethod
+    def open(cls, logan, workers: int = None, cache_blocks: int = 16):
+        """Open a view, building and saving the block index on first use."""
+        index = BlockIndex.load(logan.file_path)
+        if index is None:
+            index = cls.build_index(logan, workers)
+            index.save()
+        return cls(logan, index, cache_blocks)
+
+    @staticmethod
+    def build_index(logan, workers: int = None) -> BlockIndex:
+        """Decode the whole file once to count the records of every block."""
+        entries = []
+        tail = b''
+        first_line = 0
+        for start, end, block in logan._iter_indexed_blocks(workers):
+            data = tail + _clean_block(block)
+            cut = data.rfind(b'\n') + 1
+            tail = data[cut:]
+            min_ts = max_ts = first_ts = None
+            line_count = 0
+            for entry in LOG_ENTRY_PATTERN.finditer(data, 0, cut):
+                line_count += 1
+                timestamp = _entry_time(logan._safe_json_load(entry.group()))
+                if timestamp is not None:
+                    first_ts = timestamp if first_ts is None else first_ts
+                    min_ts = timestamp if min_ts is None else min(min_ts, timestamp)
+                    max_ts = timestamp if max_ts is None else max(max_ts, timestamp)
+            entries.append([start, end, min_ts, max_ts, first_line, line_count, first_ts])
+            first_line += line_count
+        return BlockIndex(logan.file_path, entries)
+
+    def __len__(self):
+        return self.index.line_count
+
+    def __iter__(self):
+        for i in range(len(self.index)):
+            yield from (text for _, text in self._block_lines(i))
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[line] for line in range(*item.indices(len(self)))]
+
+        line = item + len(self) if item < 0 else item
+        if not 0 <= line < len(self):
+            raise IndexError('line index out of range')
+        # 行数为 0 的数据块和下一个数据块起始行号相同，取最后一个
+        i = bisect.bisect_right(self._first_lines, line) - 1
+        return self._block_lines(i)[line - self._first_lines[i]][1]
+
+    def seek_time(self, timestamp) -> int:
+        """
+        Line number of the first record at or after timestamp, len(view) when there is none.
+
+        Args:
+            timestamp: datetime (naive means local time) or epoch milliseconds
+        """
+        timestamp = self.logan._to_millis(timestamp)
+        for i, (_, _, min_ts, max_ts, first_line, line_count, _) in enumerate(self.index.entries):
+            if not line_count or (max_ts is not None and max_ts < timestamp):
+                continue
+            for offset, (line_time, _) in enumerate(self._block_lines(i)):
+                if line_time is not None and line_time >= timestamp:
+                    return first_line + offset
+        return len(self)
+
+    def _cached(self, cache: collections.OrderedDict, key, load):
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = cache[key] = load(key)
+        if len(cache) > self.cache_blocks:
+            cache.popitem(last=False)
+        return value
+
+    def _block(self, i: int) -> bytes:
+        """Decoded bytes of block i."""
+        def load(i):
+            start, end = self.index.entries[i][:2]
+            with self.logan._map_file() as content:
+                return _clean_block(_decode_block(content[start:end], self.logan.key, self.logan.iv))
+
+        return self._cached(self._blocks, i, load)
+
+    def _tail(self, i: int) -> bytes:
+        """Unfinished line at the end of block i, which the next block completes."""
+        parts = []
+        while i >= 0:
+            block = self._block(i)
+            cut = block.rfind(b'\n') + 1
+            parts.append(block[cut:])
+            # 整个数据块都没有换行时继续向前拼接
+            if cut:
+                break
+            i -= 1
+        return b''.join(reversed(parts))
+
+    def _block_lines(self, i: int) -> list:
+        """(timestamp, formatted line) of every record ending in block i."""
+        def load(i):
+            data = self._tail(i - 1) + self._block(i)
+            lines = []
+            for entry in LOG_ENTRY_PATTERN.finditer(data, 0, data.rfind(b'\n') + 1):
+                log_json = self.logan._safe_json_load(entry.group())
+                try:
+                    text = self.logan.format_log(log_json)[0]
+                except Exception:
+                    text = entry.group().decode(errors='ignore').rstrip('\n')
+                lines.append((_entry_time(log_json), text))
+            return lines
+
+        return self._cached(self._lines, i, load)
@@ -0,0 +1,110 @@
+import collections
+import datetime
+import re
+
+from .gdsp import exception_type, gdsp_type_name, parse_mk_time, parse_timestamp
+
+SECTION_SYNC = 'sync'
+SECTION_ERROR = 'error'
+
+# 命中结果：section 决定写入哪个过滤区，text 为写入内容，error 为 format_errors 记录
+RuleHit = collections.namedtuple('RuleHit', ['rule', 'section', 'text', 'error'])
+
+SYNC_LOG_TAGS = ('GDSP', 'SyncCenter', 'HMBaseTask', 'SyncTimeUseCaseImpl', 'ServerSyncTimeRepository',
+                 'DeviceXBuilder')
+
+
+class LogRule:
+    """
+    Single classification rule applied to every formatted log line.
+
+    Args:
+        name: Rule name
+        literals: Substrings of which at least one must be in the line before the pattern runs
+        pattern: Regex that both classifies and extracts, None if the literals alone decide
+        handler: Callable (match, line) -> (section, text, error) or None
+    """
+
+    def __init__(self, name: str, literals, pattern=None, handler=None):
+        self.name = name
+        self.literals = tuple(literals)
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.handler = handler
+
+    def apply(self, line: str):
+        """Return a RuleHit for the line, or None."""
+        for literal in self.literals:
+            if literal in line:
+                break
+        else:
+            return None
+
+        match = self.pattern.search(line) if self.pattern is not None else None
+        if self.pattern is not None and match is None:
+            return None
+
+        result = self.handler(match, line)
+        if result is None:
+            return None
+        return RuleHit(self, *result)
+
+
+def _sync_log(match, line):
+    return SECTION_SYNC, line, None
+
+
+def _stop_transfer(match, line):
+    return SECTION_ERROR, line, {"type": gdsp_type_name(match.group(1)), "code": match.group(2),
+                                 "error_type": "GDSP_Header"}
+
+
+def _fetch_data(match, line):
+    return SECTION_ERROR, line, {"code": match.group(1), "error_type": "GDSP_Data"}
+
+
+def _ios_gdsp(match, line):
+    sync_name = match.group(1)  # 提取同步名称
+    error_message = match.group(4)  # 提取错误信息
+    return SECTION_ERROR, line, {"type": sync_name, "error_type": "GDSP_Data", "code": error_message}
+
+
+def _gdsp_header(match, line):
+    timestamp_str = match.group(1)  # '2025-02-21 08:07:00.303'
+    type_value = gdsp_type_name(match.group(2))  # '19'
+    mk_time_str = match.group(3)  # 'year=2025, month=2, day=20, hour=0, minute=0, second=0, tz=28'
+
+    # 将日志中的时间转换为 datetime 对象
+    timestamp = parse_timestamp(timestamp_str)
+    # 从 mk_time_str 中提取出日期和时间信息
+    mk_time = parse_mk_time(mk_time_str)
+
+    if mk_time >= timestamp + datetime.timedelta(hours=1) and not exception_type(type_value):
+        return (SECTION_ERROR, f"type:{type_value} 未来时间戳，无法同步 timestamp={timestamp} mk_time={mk_time}",
+                {"type": type_value, "error_type": "MkTime_1h_new"})
+    elif mk_time <= timestamp - datetime.timedelta(weeks=4):
+        return (SECTION_ERROR, f"type:{type_value} 同步了过去一个月的数据，需要关注 timestamp={timestamp} mk_time={mk_time}",
+                {"type": type_value, "error_type": "MkTime_1m_old"})
+    return None
+
+
+# 规则在导入时编译一次，按原有顺序排列以保持过滤区输出顺序不变
+DEFAULT_RULES = (
+    LogRule('sync_log', SYNC_LOG_TAGS, handler=_sync_log),
+    LogRule('stop_transfer', ('Stop transfer',), r'Stop transfer (\d+), code=(?!SUCCESS)(\w+)', _stop_transfer),
+    LogRule('fetch_data', ('fetchData control point:',), r'fetchData control point:.*?, desc=(?!成功)(\S+)',
+            _fetch_data),
+    LogRule('ios_gdsp', ('GDSPDomain',),
+            r"BaseJob\.swift \| GDSPDomain.*?(\S+?)\(code: (\d+)\).*?errorCode is: (\d+)\((.*?)\)", _ios_gdsp),
+    LogRule('gdsp_header', ('MkTime{',),
+            r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}).*?type:(\d+) MkTime\{(.*?)\}', _gdsp_header),
+)
+
+
+def classify(line: str, rules=DEFAULT_RULES) -> list:
+    """Run every rule against the line and return the hits in rule order."""
+    hits = []
+    for rule in rules:
+        hit = rule.apply(line)
+        if hit is not None:
+            hits.append(hit)
+    return hits
@@ -0,0 +1,48 @@
+import collections
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+STAGES = ('read', 'decrypt', 'decompress', 'json', 'format', 'classify', 'write')
+
+
+class LogStats:
+    """Per-stage timers, counters and rule hits collected during one output_log run."""
+
+    def __init__(self):
+        self.timings = dict.fromkeys(STAGES, 0.0)
+        self.counters = collections.Counter()
+        self.rule_hits = collections.Counter()
+
+    def add_time(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def merge(self, other: 'LogStats'):
+        """Add the numbers collected by another LogStats, e.g. from a worker process."""
+        for stage, seconds in other.timings.items():
+            self.add_time(stage, seconds)
+        self.counters.update(other.counters)
+        self.rule_hits.update(other.rule_hits)
+
+    @staticmethod
+    def peak_memory_mb():
+        """Peak resident memory of the current process in MB, None where unsupported."""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 为字节
+        return round(peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024, 1)
+
+    def to_dict(self) -> dict:
+        return {
+            'timings': {stage: round(seconds, 4) for stage, seconds in self.timings.items()},
+            'counters': dict(self.counters),
+            'rule_hits': dict(self.rule_hits),
+            'peak_memory_mb': self.peak_memory_mb()
+        }
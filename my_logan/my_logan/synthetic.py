@@ -0,0 +1,133 @@
+import datetime
+import json
+import os
+import random
+import zlib
+
+from Crypto.Cipher import AES
+
+from .gdsp import gdsp_type_map
+
+THREADS = ('main', 'SyncCenter-1', 'OkHttp Dispatcher', 'DefaultDispatcher-worker-2')
+TAGS = ('MainActivity', 'SyncCenter', 'HMBaseTask', 'DeviceXBuilder', 'HttpLog', 'BleManager')
+GDSP_TYPES = tuple(int(key, 16) for key in gdsp_type_map)
+
+# 行类型及其权重
+LINE_KINDS = (
+    ('normal', 80),
+    ('sync', 8),
+    ('gdsp_header', 5),
+    ('stop_transfer', 2),
+    ('fetch_data', 2),
+    ('ios_gdsp', 2),
+    ('format_error', 1),
+)
+
+
+def _mk_time(moment: datetime.datetime) -> str:
+    return (f'MkTime{{year={moment.year}, month={moment.month}, day={moment.day}, hour={moment.hour}, '
+            f'minute={moment.minute}, second={moment.second}, tz=32}}')
+
+
+def _message(kind: str, rnd: random.Random, moment: datetime.datetime) -> str:
+    if kind == 'sync':
+        return f'SyncCenter start task id={rnd.randint(1, 10000)}'
+    if kind == 'gdsp_header':
+        # 大部分正常，少量未来时间戳和一个月前的数据
+        offset = rnd.choice((datetime.timedelta(minutes=-5), datetime.timedelta(hours=3),
+                             datetime.timedelta(days=-40)))
+        return f'GDSP receive header type:{rnd.choice(GDSP_TYPES)} {_mk_time(moment + offset)}'
+    if kind == 'stop_transfer':
+        return f"Stop transfer {rnd.choice(GDSP_TYPES)}, code={rnd.choice(('SUCCESS', 'TIMEOUT', 'CRC_ERROR'))}"
+    if kind == 'fetch_data':
+        return f"fetchData control point:{rnd.randint(1, 9)}, desc={rnd.choice(('成功', '失败', '超时'))}"
+    if kind == 'ios_gdsp':
+        return (f'BaseJob.swift | GDSPDomain sync {rnd.choice(("HeartRate", "Sleep", "Stress"))}'
+                f'(code: {rnd.randint(1, 80)}) failed errorCode is: {rnd.randint(1, 9)}(timeout)')
+    return (f'request finished url=https://api.example.com/v1/items/{rnd.randint(1, 10 ** 6)} '
+            f'cost={rnd.randint(1, 999)}ms')
+
+
+def make_line(kind: str, rnd: random.Random, moment: datetime.datetime) -> bytes:
+    """Build one Logan record line, format_error lines are not valid records."""
+    if kind == 'format_error':
+        return b'not a logan record ' + str(rnd.random()).encode() + b'\n'
+
+    timestamp = int(moment.timestamp() * 1000)
+    content = json.dumps({
+        'fc': '', 'l': rnd.choice('DIWE'), 't': rnd.choice(TAGS), 'tz': '+8',
+        'm': _message(kind, rnd, moment), 'cd': '', 'time': str(timestamp)
+    }, ensure_ascii=False)
+    thread = rnd.choice(THREADS)
+    record = {'c': content, 'f': 1, 'l': timestamp, 'n': thread, 'i': THREADS.index(thread) + 1,
+              'm': thread == 'main'}
+    return json.dumps(record, ensure_ascii=False).encode() + b'\n'
+
+
+def encrypt_block(data: bytes, key: bytes, iv: bytes) -> bytes:
+    """gzip compress and AES-CBC encrypt one block the way the Logan SDK does."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    compressed = compressor.compress(data) + compressor.flush()
+    compressed += b'\x00' * (-len(compressed) % AES.block_size)
+    return AES.new(key, AES.MODE_CBC, iv).encrypt(compressed)
+
+
+def frame_block(encrypted: bytes) -> bytes:
+    return b'\x01' + len(encrypted).to_bytes(4, byteorder='big') + encrypted + b'\x00'
+
+
+def generate_logan_file(file_path: str, key: bytes, iv: bytes, blocks: int = 100, lines_per_block: int = 200,
+                        malformed_ratio: float = 0.0, start_time: datetime.datetime = None,
+                        seed: int = None) -> dict:
+    """
+    Write a synthetic encrypted Logan file.
+
+    Args:
+        file_path: Output path
+        key: AES key
+        iv: AES iv
+        blocks: Number of blocks
+        lines_per_block: Log lines in each block
+        malformed_ratio: Share of blocks written corrupt (bad ciphertext, bad length or stray bytes)
+        start_time: Time of the first line, defaults to now
+        seed: Random seed for reproducible files
+
+    Returns:
+        Dictionary with file size, block, malformed block and line counts
+    """
+    rnd = random.Random(seed)
+    kinds = [kind for kind, _ in LINE_KINDS]
+    weights = [weight for _, weight in LINE_KINDS]
+    moment = start_time or datetime.datetime.now().replace(microsecond=0)
+
+    lines = 0
+    malformed = 0
+    with open(file_path, 'wb') as f:
+        for _ in range(blocks):
+            data = bytearray()
+            for kind in rnd.choices(kinds, weights, k=lines_per_block):
+                data += make_line(kind, rnd, moment)
+                moment += datetime.timedelta(milliseconds=rnd.randint(1, 500))
+            encrypted = encrypt_block(bytes(data), key, iv)
+
+            if rnd.random() < malformed_ratio:
+                malformed += 1
+                damage = rnd.choice(('ciphertext', 'length', 'stray'))
+                if damage == 'ciphertext':
+                    f.write(frame_block(rnd.randbytes(len(encrypted))))
+                elif damage == 'length':
+                    f.write(b'\x01' + b'\xff\xff\xff\xf0' + encrypted + b'\x00')
+                else:
+                    f.write(rnd.randbytes(rnd.randint(1, 64)).replace(b'\x01', b'\x02') + frame_block(encrypted))
+                    lines += lines_per_block
+                continue
+
+            f.write(frame_block(encrypted))
+            lines += lines_per_block
+
+    return {
+        'file_size': os.path.getsize(file_path),
+        'blocks': blocks,
+        'malformed_blocks': malformed,
+        'lines': lines
+    }
@@ -0,0 +1,181 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 压缩方式对应的默认文件后缀
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+# 攒够这么多字符再写一次文件
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def open_binary(path: str, mode: str = 'wb', compression: str = None):
+    """
+    Open a file in binary mode, transparently (de)compressing gzip or zstd.
+
+    Args:
+        path: File path
+        mode: 'wb' or 'rb'
+        compression: None, 'gzip' or 'zstd'
+    """
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f'Unsupported compression: {compression}')
+    if compression is None:
+        return open(path, mode)
+    if compression == 'gzip':
+        return gzip.open(path, mode, compresslevel=6)
+    if zstandard is None:
+        raise ImportError('zstd 压缩需要安装 zstandard: pip install my_logan[zstd]')
+    if 'r' in mode:
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+    return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))
+
+
+class OutputWriter:
+    """
+    Buffered utf-8 text writer over a binary (possibly compressed) file.
+
+    Lines are collected in memory and written in WRITE_BUFFER_SIZE batches.
+    tell() returns the uncompressed byte position, so offsets stay usable
+    for checkpoints and the result cache.
+
+    Args:
+        file: Binary file object
+        position: Byte position the file is at
+        buffer_size: Number of characters buffered before writing
+    """
+
+    def __init__(self, file, position: int = 0, buffer_size: int = WRITE_BUFFER_SIZE):
+        self.file = file
+        self.position = position
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._pending = 0
+
+    @classmethod
+    def open(cls, path: str, compression: str = None, position: int = None):
+        """
+        Open an output file, or reopen it at position to overwrite everything after it.
+        """
+        if position is None:
+            return cls(open_binary(path, 'wb', compression))
+        file = open(path, 'r+b')
+        file.seek(position)
+        file.truncate()
+        return cls(file, position)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, text: str):
+        self._buffer.append(text)
+        self._pending += len(text)
+        if self._pending >= self.buffer_size:
+            self.flush()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def write_file(self, source):
+        """Copy the rest of a binary file object as is."""
+        self.flush()
+        self.position += _copy(source, self.file)
+
+    def flush(self):
+        if self._buffer:
+            data = ''.join(self._buffer).encode('utf-8', errors='backslashreplace')
+            self.file.write(data)
+            self.position += len(data)
+            self._buffer = []
+            self._pending = 0
+
+    def tell(self) -> int:
+        self.flush()
+        return self.position
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class SpillFile:
+    """
+    Append-only list of lines kept in a file instead of memory.
+
+    Args:
+        path: Keep the lines in this file, appending after size bytes; a temporary file when None
+        size: Valid length of an existing file, anything after it is dropped
+    """
+
+    def __init__(self, path: str = None, size: int = 0):
+        if path is None:
+            self.file = tempfile.TemporaryFile()
+        else:
+            self.file = open(path, 'r+b' if size and os.path.exists(path) else 'w+b')
+            self.file.truncate(size)
+            self.file.seek(size)
+        self._buffer = []
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, line: str):
+        self._buffer.append(line)
+        self._pending += len(line)
+        if self._pending >= WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.file.write(''.join(f'{line}\n' for line in self._buffer).encode('utf-8', errors='backslashreplace'))
+            self._buffer = []
+            self._pending = 0
+
+    def tell(self) -> int:
+        self.flush()
+        return self.file.tell()
+
+    def copy_to(self, writer: OutputWriter):
+        """Write all lines to the writer."""
+        end = self.tell()
+        self.file.seek(0)
+        writer.write_file(self.file)
+        self.file.seek(end)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def _copy(source, target) -> int:
+    copied = 0
+    while chunk := source.read(WRITE_BUFFER_SIZE):
+        target.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
+def copy_body(source_path: str, target, offset: int = 0, compression: str = None):
+    """Copy a (possibly compressed) output file from the uncompressed offset on to a binary file object."""
+    with open_binary(source_path, 'rb', compression) as source:
+        # 压缩文件只能向前跳过
+        remaining = offset
+        while remaining:
+            skipped = len(source.read(min(remaining, WRITE_BUFFER_SIZE)))
+            if not skipped:
+                break
+            remaining -= skipped
+        shutil.copyfileobj(source, target)
@@ -13,6 +13,15 @@ setup(
     version="0.0.1",
     packages=find_packages(),
     install_requires=[],  # 如果有依赖包，可以在这里列出
+    extras_require={
+        'orjson': ['orjson'],
+        'zstd': ['zstandard'],
+    },
+    entry_points={
+        'console_scripts': [
+            'my_logan=my_logan.batch:main',
+        ],
+    },
     author="br3ant",
     author_email="houqiqi@zepp.com",
     description="Zepp HMLogan 的封装",
@@ -0,0 +1,68 @@
+import contextlib
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from my_logan import ErrorIndex
+from my_logan.batch import main, process_many
+from my_logan.synthetic import generate_logan_file
+
+KEY = b'0123456789abcdef'
+IV = b'fedcba9876543210'
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_dir = os.path.join(self.tmp_dir, 'logs')
+        self.out_dir = os.path.join(self.tmp_dir, 'out')
+        os.makedirs(os.path.join(self.log_dir, 'other'))
+        for i, path in enumerate(['a.log', 'b.log', os.path.join('other', 'a.log')]):
+            generate_logan_file(os.path.join(self.log_dir, path), KEY, IV, blocks=3, lines_per_block=10,
+                                start_time=datetime.datetime(2025, 2, 21, 8), seed=i)
+        with open(os.path.join(self.log_dir, 'broken.log'), 'wb') as f:
+            f.write(b'not a logan file')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_process_many(self):
+        paths = [os.path.join(self.log_dir, name) for name in ('a.log', os.path.join('other', 'a.log'), 'b.log')]
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = process_many(paths, self.out_dir, KEY, IV, workers=2)
+
+        self.assertEqual((report['total'], report['succeeded'], report['failed']), (3, 3, 0))
+        # 报告按输入顺序排列
+        self.assertEqual([item['file'] for item in report['files']], paths)
+        # 同名文件的输出不能互相覆盖
+        out_files = [item['out_file'] for item in report['files']]
+        self.assertEqual(len(set(out_files)), 3)
+        self.assertTrue(all(os.path.exists(path) for path in out_files))
+        with open(os.path.join(self.out_dir, 'report.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), report)
+
+    def test_main(self):
+        report_path = os.path.join(self.tmp_dir, 'report.json')
+        index_path = os.path.join(self.tmp_dir, 'errors.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            code = main([self.log_dir, '-o', self.out_dir, '--key', KEY.decode(), '--iv', IV.decode(), '-w', '2',
+                         '--report', report_path, '--compression', 'gzip', '--error-index', index_path])
+
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        # 目录下只处理文件本身，子目录不递归；解析失败的文件使退出码非 0
+        self.assertEqual(code, 1)
+        self.assertEqual(report['total'], 3)
+        self.assertEqual(report['failed'], 1)
+        self.assertTrue(all(item['out_file'].endswith('.gz') for item in report['files'] if item['status']))
+        with ErrorIndex(index_path) as index:
+            self.assertTrue(index.top())
+
+
+if __name__ == '__main__':
+    unittest.main()
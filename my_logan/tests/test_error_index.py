@@ -0,0 +1,92 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from my_logan import ErrorIndex, MyLogan
+from my_logan.synthetic import generate_logan_file
+
+KEY = b'0123456789abcdef'
+IV = b'fedcba9876543210'
+ANDROID = {'version_name': '1.0', 'platform': 'android'}
+IOS = {'version_name': '1.0', 'platform': 'ios'}
+TIMEOUT = {'type': 'HeartRate', 'error_type': 'GDSP_Data', 'code': 'timeout'}
+CRC = {'type': 'Health center(75)', 'error_type': 'GDSP_Header', 'code': 'CRC_ERROR'}
+
+
+class TestErrorIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index = ErrorIndex(os.path.join(self.tmp_dir, 'errors.db'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def files(self, error):
+        return {(row['platform'], row['files']) for row in self.index.top(type=error['type'])}
+
+    def test_ingest(self):
+        # 同一个文件里重复的错误只算一次
+        self.assertTrue(self.index.ingest('a.log', ANDROID, [TIMEOUT, TIMEOUT, CRC]))
+        self.assertTrue(self.index.ingest('b.log', ANDROID, [TIMEOUT]))
+        self.assertTrue(self.index.ingest('c.log', IOS, [TIMEOUT]))
+
+        top = self.index.top(1)
+        self.assertEqual(top, [{**TIMEOUT, 'app_version': '1.0', 'platform': 'android', 'files': 2}])
+        self.assertEqual(self.files(TIMEOUT), {('android', 2), ('ios', 1)})
+        self.assertEqual(self.files(CRC), {('android', 1)})
+
+    def test_reingest(self):
+        self.index.ingest('a.log', ANDROID, [TIMEOUT, CRC])
+        self.index.ingest('b.log', ANDROID, [TIMEOUT])
+        # 内容相同的重复导入不改变计数
+        self.assertFalse(self.index.ingest('a.log', ANDROID, [CRC, TIMEOUT]))
+        self.assertEqual(self.files(TIMEOUT), {('android', 2)})
+
+        # 内容变化时替换上次的贡献
+        self.assertTrue(self.index.ingest('a.log', ANDROID, [CRC]))
+        self.assertEqual(self.files(TIMEOUT), {('android', 1)})
+        self.assertTrue(self.index.ingest('a.log', ANDROID, []))
+        self.assertEqual(self.files(CRC), set())
+        self.assertEqual(len(self.index.rows()), 1)
+
+    def test_group_by(self):
+        self.index.ingest('a.log', ANDROID, [TIMEOUT, CRC])
+        self.index.ingest('b.log', IOS, [TIMEOUT])
+        self.index.ingest('c.log', IOS, [CRC])
+
+        self.assertEqual(self.index.group_by('platform'), [{'platform': 'ios', 'files': 2},
+                                                           {'platform': 'android', 'files': 1}])
+        self.assertEqual(self.index.group_by(['type', 'platform'], n=1, platform='android')[0]['files'], 1)
+        self.assertEqual(self.index.group_by('error_type', error_type='GDSP_Header'),
+                         [{'error_type': 'GDSP_Header', 'files': 2}])
+        with self.assertRaises(ValueError):
+            self.index.group_by('message')
+        with self.assertRaises(ValueError):
+            self.index.top(message='timeout')
+
+    def test_ingest_result_and_report(self):
+        log_path = os.path.join(self.tmp_dir, 'test.log')
+        generate_logan_file(log_path, KEY, IV, blocks=5, lines_per_block=20,
+                            start_time=datetime.datetime(2025, 2, 21, 8), seed=1)
+        result = MyLogan(log_path, KEY, IV).output_log(self.tmp_dir, 'out.txt')
+        report = {'files': [{'file': log_path, 'status': True, 'app_info': result['app_info'],
+                             'format_errors': json.loads(result['format_errors'])}]}
+        report_path = os.path.join(self.tmp_dir, 'report.json')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f)
+
+        self.assertTrue(self.index.ingest_result(result))
+        # 结果和报告里的同一个文件只计一次
+        self.assertEqual(self.index.ingest_report(report_path), 0)
+        self.assertTrue(all(row['files'] == 1 for row in self.index.top(100)))
+        self.assertEqual(sum(row['files'] for row in self.index.group_by('type')),
+                         len({error.get('type') or '' for error in report['files'][0]['format_errors']}))
+
+
+if __name__ == '__main__':
+    unittest.main()
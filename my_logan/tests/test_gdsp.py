@@ -0,0 +1,56 @@
+import datetime
+import re
+import unittest
+
+from my_logan.gdsp import gdsp_type_map, gdsp_type_name, get_gdsp_type_form_map, parse_mk_time, parse_timestamp
+
+MK_TIME_FIELD_PATTERN = re.compile(r'(\w+)=(\d+)')
+
+
+def legacy_type_name(type):
+    hex_number = hex(int(type))
+    formatted_hex = hex_number[:2] + hex_number[2:].zfill(2).upper()
+    return gdsp_type_map.get(formatted_hex, type) + f"({type})"
+
+
+def legacy_mk_time(text):
+    values = {k: int(v) for k, v in MK_TIME_FIELD_PATTERN.findall(text)}
+    return datetime.datetime(values['year'], values['month'], values['day'],
+                             values['hour'], values['minute'], values['second'])
+
+
+class TestGdsp(unittest.TestCase):
+
+    def test_type_name(self):
+        for value in [str(i) for i in range(300)] + ['007']:
+            self.assertEqual(gdsp_type_name(value), legacy_type_name(value))
+            self.assertEqual(get_gdsp_type_form_map(value), legacy_type_name(value))
+        with self.assertRaises(ValueError):
+            gdsp_type_name('abc')
+
+    def test_parse_timestamp(self):
+        for text in ['2025-02-21 08:00:00.000', '2025-12-31 23:59:59.999', '2024-02-29 12:30:05.042']:
+            self.assertEqual(parse_timestamp(text), datetime.datetime.strptime(text, '%Y-%m-%d %H:%M:%S.%f'))
+
+    def test_parse_mk_time(self):
+        texts = [
+            'year=2025, month=2, day=20, hour=0, minute=0, second=0, tz=28',
+            'year=2025,month=12,day=31,hour=23,minute=59,second=59',
+            # 顺序不同、多出字段或格式不规范时走正则
+            'tz=28, second=5, minute=4, hour=3, day=2, month=1, year=2024',
+            'year=2025, month=2, day=20, hour=0, minute=0, second=0, extra={a=1}',
+            'year=2025; month=2; day=20; hour=1; minute=2; second=3',
+        ]
+        for text in texts:
+            self.assertEqual(parse_mk_time(text), legacy_mk_time(text))
+
+        # 缺少字段或数值越界时抛出与原实现相同的异常
+        for text in ['year=2025, month=2, day=20', 'year=2025, month=13, day=20, hour=0, minute=0, second=0']:
+            with self.assertRaises(Exception) as legacy:
+                legacy_mk_time(text)
+            with self.assertRaises(type(legacy.exception)):
+                parse_mk_time(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
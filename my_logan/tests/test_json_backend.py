@@ -0,0 +1,39 @@
+import math
+import unittest
+
+from my_logan import json_backend
+
+
+class TestJsonBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = json_backend.backend_name()
+
+    def tearDown(self):
+        json_backend.use_backend(self.backend)
+
+    def test_default_backend(self):
+        expected = 'orjson' if json_backend.orjson is not None else 'json'
+        self.assertEqual(self.backend, expected)
+
+    def test_use_backend(self):
+        for name in json_backend.BACKENDS:
+            json_backend.use_backend(name)
+            self.assertEqual(json_backend.backend_name(), name)
+            self.assertEqual(json_backend.loads(b'{"c":"\xe4\xb8\xad","l":1}'), {'c': '中', 'l': 1})
+            self.assertEqual(json_backend.loads('[1, 2]'), [1, 2])
+        with self.assertRaises(ValueError):
+            json_backend.use_backend('simplejson')
+
+    @unittest.skipIf(json_backend.orjson is None, 'orjson is not installed')
+    def test_orjson_fallback(self):
+        json_backend.use_backend('orjson')
+        # orjson 不接受 NaN、Infinity，应回退到标准库
+        self.assertTrue(math.isnan(json_backend.loads(b'{"v": NaN}')['v']))
+        self.assertEqual(json_backend.loads(b'[Infinity, -Infinity]'), [math.inf, -math.inf])
+        with self.assertRaises(ValueError):
+            json_backend.loads(b'{"v": ')
+
+
+if __name__ == '__main__':
+    unittest.main()
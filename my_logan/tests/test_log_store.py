@@ -0,0 +1,73 @@
+import datetime
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from my_logan import MyLogan, SqliteLogStore
+from my_logan.synthetic import generate_logan_file
+
+KEY = b'0123456789abcdef'
+IV = b'fedcba9876543210'
+
+
+def record(timestamp, level, tag, message):
+    content = json.dumps({'l': level, 't': tag, 'm': message})
+    return {'c': content, 'f': 1, 'l': timestamp, 'n': 'main', 'i': 1, 'm': True}
+
+
+class TestSqliteLogStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'logs.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def count(self):
+        connection = sqlite3.connect(self.db_path)
+        try:
+            return connection.execute('SELECT COUNT(*) FROM logs').fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_add_and_search(self):
+        with SqliteLogStore(self.db_path, batch_size=2) as store:
+            store.add(record(1, 'I', 'net', 'connect timeout'))
+            store.add(record(2, 'E', 'ui', 'render failed'))
+            store.add(record(3, 'W', 'net', 'retry connect'))
+            # 内容不是 json 时只保留外层字段
+            store.add({'c': 'not json', 'l': 4, 'n': 'main'})
+        self.assertEqual(self.count(), 4)
+
+        rows = SqliteLogStore.search(self.db_path, 'connect')
+        self.assertEqual([row['timestamp'] for row in rows], [1, 3])
+        self.assertEqual(rows[0]['tag'], 'net')
+        self.assertEqual(rows[0]['level'], 'I')
+        self.assertEqual(SqliteLogStore.search(self.db_path, 'connect', limit=1)[0]['message'], 'connect timeout')
+
+    def test_append(self):
+        with SqliteLogStore(self.db_path) as store:
+            store.add(record(1, 'I', 'net', 'first'))
+        with SqliteLogStore(self.db_path, append=True) as store:
+            store.add(record(2, 'I', 'net', 'second'))
+        self.assertEqual(self.count(), 2)
+        # 默认重建数据库
+        with SqliteLogStore(self.db_path) as store:
+            store.add(record(3, 'I', 'net', 'third'))
+        self.assertEqual(self.count(), 1)
+
+    def test_output_log(self):
+        log_path = os.path.join(self.tmp_dir, 'test.log')
+        generate_logan_file(log_path, KEY, IV, blocks=5, lines_per_block=20,
+                            start_time=datetime.datetime(2025, 2, 21, 8), seed=1)
+        result = MyLogan(log_path, KEY, IV).output_log(self.tmp_dir, 'out.txt', db_path=self.db_path)
+        self.assertEqual(result['db_file'], self.db_path)
+        self.assertEqual(self.count(), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from my_logan import MyLogan, ResultCache
+from my_logan.synthetic import encrypt_block, frame_block, generate_logan_file
+
+KEY = b'0123456789abcdef'
+IV = b'fedcba9876543210'
+START_TIME = datetime.datetime(2025, 2, 21, 8)
+
+
+def read_body(path):
+    """输出文件去掉第一行的输出路径和处理用时，剩下的内容应与解码方式无关"""
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    return [line for line in lines[1:] if not line.startswith('处理用时')]
+
+
+class TestMyLogan(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.tmp_dir, 'test.log')
+        generate_logan_file(self.log_path, KEY, IV, blocks=30, lines_per_block=50, start_time=START_TIME, seed=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def output(self, fn, **kwargs):
+        return MyLogan(self.log_path, KEY, IV).output_log(self.tmp_dir, fn, **kwargs)
+
+    def test_parallel(self):
+        serial = self.output('serial.txt')
+        parallel = self.output('parallel.txt', workers=2)
+        self.assertTrue(serial['status'])
+        self.assertEqual(read_body(serial['out_file']), read_body(parallel['out_file']))
+        self.assertEqual(serial['format_errors'], parallel['format_errors'])
+
+    def test_resume(self):
+        # 先解码一部分，追加数据块后续解
+        with open(self.log_path, 'rb') as f:
+            data = f.read()
+        with open(self.log_path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+        self.output('resume.txt', resume=True)
+        with open(self.log_path, 'wb') as f:
+            f.write(data)
+        resumed = self.output('resume.txt', resume=True)
+        # 没有新数据时续解不应报告损坏
+        unchanged = self.output('resume.txt', resume=True)
+        full = self.output('full.txt')
+
+        self.assertEqual(read_body(resumed['out_file']), read_body(full['out_file']))
+        self.assertEqual(read_body(unchanged['out_file']), read_body(full['out_file']))
+        self.assertEqual(resumed['corruption']['skipped_ranges'], [])
+        self.assertEqual(unchanged['corruption']['skipped_ranges'], [])
+
+    def test_cache(self):
+        cache = ResultCache(os.path.join(self.tmp_dir, 'cache'))
+        first = self.output('first.txt', cache=cache)
+        cached = self.output('cached.txt', cache=cache)
+        self.assertEqual(read_body(first['out_file']), read_body(cached['out_file']))
+        self.assertEqual(first['format_errors'], cached['format_errors'])
+
+    def test_time_filter(self):
+        since = START_TIME + datetime.timedelta(minutes=1)
+        until = START_TIME + datetime.timedelta(minutes=2)
+        # 第一次没有块索引，第二次借助完整解码生成的块索引跳过数据块
+        scanned = self.output('scanned.txt', since=since, until=until)
+        self.output('full.txt')
+        indexed = self.output('indexed.txt', since=since, until=until)
+        self.assertGreater(indexed['stats']['counters']['skipped_blocks'], 0)
+        self.assertEqual(read_body(scanned['out_file']), read_body(indexed['out_file']))
+
+    def test_view(self):
+        full = self.output('full.txt')
+        view = MyLogan(self.log_path, KEY, IV).open_view(cache_blocks=2)
+        lines = list(view)
+        self.assertEqual(len(view), len(lines))
+        self.assertEqual(view[-1], lines[-1])
+        self.assertEqual(view[100:110], lines[100:110])
+        # 输出文件主体就是全部格式化后的日志
+        body = read_body(full['out_file'])
+        start = body.index(lines[0])
+        self.assertEqual(body[start:start + len(lines)], lines)
+        self.assertEqual(view.seek_time(START_TIME), 0)
+
+    def test_corruption(self):
+        blocks = [frame_block(encrypt_block(b'{"c":"{}","f":1,"l":1,"n":"main","i":1,"m":true}\n', KEY, IV))
+                  for _ in range(3)]
+        garbage = b'garbage\x01\x00\x00'
+        with open(self.log_path, 'wb') as f:
+            f.write(blocks[0] + garbage + blocks[1] + frame_block(b'\x55' * 32) + blocks[2] + b'\x01\x00')
+
+        start = len(blocks[0])
+        end = len(blocks[0] + garbage + blocks[1] + frame_block(b'\x55' * 32) + blocks[2])
+        expected = {
+            'skipped_ranges': [[start, start + len(garbage)], [end, end + 2]],
+            'skipped_bytes': len(garbage) + 2,
+            'corrupt_blocks': 1
+        }
+        self.assertEqual(self.output('corrupt.txt')['corruption'], expected)
+        self.assertEqual(self.output('corrupt_parallel.txt', workers=2)['corruption'], expected)
+        parsed = MyLogan(self.log_path, KEY, IV).parse_log()
+        self.assertEqual(len(parsed['unformat_data']), 4)
+        self.assertEqual(parsed['corruption'], expected)
+
+    def test_bad_frame_length(self):
+        blocks = [frame_block(encrypt_block(b'{"c":"{}","f":1,"l":1,"n":"main","i":1,"m":true}\n', KEY, IV))
+                  for _ in range(3)]
+        # 帧头长度写成 32 但只有 16 字节数据，按长度读取会吞掉下一个数据块的开头
+        bad_frame = b'\x01' + (32).to_bytes(4, byteorder='big') + b'\x55' * 16
+        with open(self.log_path, 'wb') as f:
+            f.write(blocks[0] + bad_frame + blocks[1] + blocks[2])
+
+        start = len(blocks[0])
+        expected = {
+            'skipped_ranges': [[start, start + len(bad_frame)]],
+            'skipped_bytes': len(bad_frame),
+            'corrupt_blocks': 0
+        }
+        self.assertEqual(self.output('bad_frame.txt')['corruption'], expected)
+        self.assertEqual(self.output('bad_frame_parallel.txt', workers=2)['corruption'], expected)
+        parsed = MyLogan(self.log_path, KEY, IV).parse_log()
+        self.assertEqual(len(parsed['unformat_data']), 3)
+
+    def test_malformed_synthetic(self):
+        info = generate_logan_file(self.log_path, KEY, IV, blocks=40, lines_per_block=20, malformed_ratio=0.3,
+                                   start_time=START_TIME, seed=2)
+        result = self.output('malformed.txt')
+        self.assertTrue(result['status'])
+        self.assertGreater(result['corruption']['skipped_bytes'], 0)
+        # 每个解码失败的数据块输出一条 Error 记录，其余行都来自完好的数据块
+        corrupt_blocks = result['corruption']['corrupt_blocks']
+        self.assertLessEqual(result['stats']['counters']['lines'] - corrupt_blocks, info['lines'])
+        self.assertLessEqual(corrupt_blocks, info['malformed_blocks'])
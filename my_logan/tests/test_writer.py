@@ -0,0 +1,94 @@
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from my_logan import MyLogan
+from my_logan.synthetic import generate_logan_file
+from my_logan.writer import OutputWriter, SpillFile, copy_body, open_binary, zstandard
+
+KEY = b'0123456789abcdef'
+IV = b'fedcba9876543210'
+LINES = [f'第 {i} 行\n' for i in range(1000)]
+
+
+class TestWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def roundtrip(self, compression):
+        path = os.path.join(self.tmp_dir, f'out_{compression}')
+        # 缓冲区很小，保证写入分成多次
+        with OutputWriter(open_binary(path, 'wb', compression), buffer_size=100) as writer:
+            writer.writelines(LINES)
+            # tell 返回未压缩的字节位置
+            self.assertEqual(writer.tell(), len(''.join(LINES).encode()))
+        with open_binary(path, 'rb', compression) as f:
+            self.assertEqual(f.read().decode(), ''.join(LINES))
+
+        target = io.BytesIO()
+        offset = len(''.join(LINES[:10]).encode())
+        copy_body(path, target, offset, compression)
+        self.assertEqual(target.getvalue().decode(), ''.join(LINES[10:]))
+
+    def test_plain(self):
+        self.roundtrip(None)
+
+    def test_gzip(self):
+        self.roundtrip('gzip')
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd(self):
+        self.roundtrip('zstd')
+
+    def test_unsupported_compression(self):
+        with self.assertRaises(ValueError):
+            open_binary(os.path.join(self.tmp_dir, 'out'), 'wb', 'bz2')
+
+    def test_spill_file(self):
+        path = os.path.join(self.tmp_dir, 'spill')
+        with SpillFile(path) as spill:
+            spill.append('a')
+            spill.append('b')
+            size = spill.tell()
+            spill.append('dropped')
+
+        # 续写时丢弃 size 之后的内容
+        out_path = os.path.join(self.tmp_dir, 'out')
+        with SpillFile(path, size) as spill, OutputWriter.open(out_path) as writer:
+            spill.append('c')
+            spill.copy_to(writer)
+            spill.append('d')
+            spill.copy_to(writer)
+        with open(out_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'a\nb\nc\na\nb\nc\nd\n')
+
+        with SpillFile() as spill:
+            spill.append('temporary')
+            self.assertEqual(spill.tell(), len('temporary\n'))
+
+    def test_output_log_compression(self):
+        log_path = os.path.join(self.tmp_dir, 'test.log')
+        generate_logan_file(log_path, KEY, IV, blocks=5, lines_per_block=20,
+                            start_time=datetime.datetime(2025, 2, 21, 8), seed=1)
+        plain = MyLogan(log_path, KEY, IV).output_log(self.tmp_dir, 'plain.txt')
+        compressed = MyLogan(log_path, KEY, IV).output_log(self.tmp_dir, 'compressed.txt.gz', compression='gzip')
+        with open(plain['out_file'], 'rb') as f:
+            plain_lines = f.read().splitlines()
+        with open_binary(compressed['out_file'], 'rb', 'gzip') as f:
+            compressed_lines = f.read().splitlines()
+        # 第一行是输出路径，处理用时每次都不同
+        self.assertEqual([line for line in plain_lines[1:] if not line.startswith('处理用时'.encode())],
+                         [line for line in compressed_lines[1:] if not line.startswith('处理用时'.encode())])
+        with self.assertRaises(ValueError):
+            MyLogan(log_path, KEY, IV).output_log(self.tmp_dir, 'resume.txt.gz', compression='gzip', resume=True)
+
+
+if __name__ == '__main__':
+    unittest.main()